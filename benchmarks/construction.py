@@ -0,0 +1,37 @@
+"""
+Measure the cost of constructing override_settings instances.
+
+The "cold" numbers throw away the global_settings snapshot before every
+construction, which is what each instance used to pay.  The "warm"
+numbers reuse the cached snapshot.
+
+Run from the top of the checkout::
+
+    python benchmarks/construction.py
+"""
+import timeit
+
+from django.conf import settings
+if not settings.configured:
+    settings.configure()
+
+import override_settings as module
+from override_settings import override_settings
+
+NUMBER = 10000
+
+def cold():
+    module.clear_global_settings_cache()
+    override_settings(FOO="abc")
+    module.get_global_settings()
+
+def warm():
+    override_settings(FOO="abc")
+
+def main():
+    for name, func in (('cold', cold), ('warm', warm)):
+        seconds = min(timeit.repeat(func, number=NUMBER, repeat=3))
+        print('%-5s %8.2f usec per construction' % (name, seconds / NUMBER * 1e6))
+
+if __name__ == '__main__':
+    main()
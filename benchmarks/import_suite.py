@@ -0,0 +1,145 @@
+"""
+Measure what decorating a large suite costs at import time.
+
+A synthetic test module with many override_settings-decorated classes
+and methods is written to a temporary directory and imported in a fresh
+interpreter, once with every decorator building its SettingsDelta when
+it's created (eager, as before construction was deferred) and once as
+the package does now (deferred).  Each mode runs in its own process.
+
+Memory is measured with tracemalloc where it's available (Python 3.4
+and later), and otherwise as the growth of the process's peak RSS,
+which importing the suite drives up.
+
+Run from the top of the checkout::
+
+    python benchmarks/import_suite.py --classes 500 --methods 10
+"""
+from __future__ import print_function
+
+import optparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+TEMPLATE_CLASS = '''
+@override_settings(FEATURE_%(i)d=True, LEVEL=%(i)d, NAMES=['a', 'b', 'c'])
+class Test%(i)d(unittest.TestCase):
+%(methods)s
+'''
+
+TEMPLATE_METHOD = '''
+    @override_settings(OPTION=%(j)d, PATHS={'root': '/tmp/%(j)d'})
+    def test_%(j)d(self):
+        pass
+'''
+
+MEASURE = '''
+import sys, time
+sys.path.insert(0, %(path)r)
+from django.conf import settings
+settings.configure()
+import override_settings
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+    import resource
+
+def memory():
+    if tracemalloc:
+        return tracemalloc.get_traced_memory()[0]
+    # Peak RSS, in bytes on Mac OS X and KiB elsewhere.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return rss
+    return rss * 1024
+
+if %(eager)r:
+    init = override_settings.override_settings.__init__
+    def eager_init(self, **kwargs):
+        init(self, **kwargs)
+        self.delta.frozen()
+    override_settings.override_settings.__init__ = eager_init
+
+if tracemalloc:
+    tracemalloc.start()
+before, start = memory(), time.time()
+import synthetic_tests
+print('%%r %%r' %% (time.time() - start, memory() - before))
+'''
+
+MODES = ('eager', 'deferred')
+
+def write_suite(path, classes, methods):
+    body = ['import unittest', 'from override_settings import override_settings']
+    method_source = ''.join(TEMPLATE_METHOD % {'j': j} for j in range(methods))
+    for i in range(classes):
+        body.append(TEMPLATE_CLASS % {'i': i, 'methods': method_source})
+    f = open(os.path.join(path, 'synthetic_tests.py'), 'w')
+    try:
+        f.write('\n'.join(body))
+    finally:
+        f.close()
+
+def run(args, env):
+    # subprocess.check_output() is new in Python 2.7.
+    process = subprocess.Popen(args, env=env, stdout=subprocess.PIPE)
+    output = process.communicate()[0]
+    if process.returncode:
+        raise RuntimeError("%s failed" % (args,))
+    return output
+
+def measure(path, mode, repeat):
+    """
+    Return the best (seconds, bytes) of `repeat` imports of the suite
+    in `mode`.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [os.getcwd()] + [p for p in [env.get('PYTHONPATH')] if p])
+    source = MEASURE % {'path': path, 'eager': mode == 'eager'}
+    # Compile up front so every run imports from bytecode, even with
+    # PYTHONDONTWRITEBYTECODE set; compiling would dwarf the rest.
+    run([sys.executable, '-m', 'py_compile',
+         os.path.join(path, 'synthetic_tests.py')], env)
+    runs = []
+    for i in range(repeat):
+        output = run([sys.executable, '-c', source], env)
+        runs.append(tuple(float(value) for value in output.split()))
+    return min(runs)
+
+def main(argv=None):
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('--classes', type='int', default=500)
+    parser.add_option('--methods', type='int', default=10)
+    parser.add_option('--repeat', type='int', default=5)
+    options, args = parser.parse_args(argv)
+
+    try:
+        import tracemalloc
+        method = 'traced memory'
+    except ImportError:
+        method = 'peak RSS'
+
+    path = tempfile.mkdtemp()
+    try:
+        write_suite(path, options.classes, options.methods)
+        print('%d decorated classes, %d decorated methods' % (
+            options.classes, options.classes * options.methods))
+        print('%-10s %12s %14s' % ('mode', 'import msec', method))
+        results = {}
+        for mode in MODES:
+            results[mode] = measure(path, mode, options.repeat)
+            print('%-10s %12.1f %10.1f KiB' % (
+                mode, results[mode][0] * 1000, results[mode][1] / 1024.0))
+        eager, deferred = results['eager'], results['deferred']
+        print('deferred saves %.1f msec and %.1f KiB' % (
+            (eager[0] - deferred[0]) * 1000, (eager[1] - deferred[1]) / 1024.0))
+    finally:
+        shutil.rmtree(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Measure how long reading a setting takes under nested overrides.
+
+Each row reads one setting that is overridden at every level (FOO) and
+one that isn't overridden at all (DEBUG).  The 0 row is the baseline
+without any override enabled.
+
+Run from the top of the checkout::
+
+    python benchmarks/lookup.py
+"""
+import timeit
+
+from django.conf import settings
+if not settings.configured:
+    settings.configure(FOO="base")
+
+from override_settings import override_settings
+
+NUMBER = 200000
+DEPTHS = (0, 1, 10, 50)
+
+def read_foo():
+    settings.FOO
+
+def read_debug():
+    settings.DEBUG
+
+def measure(depth):
+    overrides = [override_settings(FOO=i) for i in range(depth)]
+    for override in overrides:
+        override.enable()
+    try:
+        return [min(timeit.repeat(func, number=NUMBER, repeat=3)) / NUMBER * 1e9
+                for func in (read_foo, read_debug)]
+    finally:
+        for override in reversed(overrides):
+            override.disable()
+
+def main():
+    print('%5s %14s %14s' % ('depth', 'FOO (nsec)', 'DEBUG (nsec)'))
+    for depth in DEPTHS:
+        print('%5d %14.1f %14.1f' % ((depth,) + tuple(measure(depth))))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""
+Benchmark suite for django-override-settings.
+
+Covers constructing overrides, enabling and disabling them, reading
+settings under nested overrides, decorating TestCases with many
+methods, and with_apps/without_apps on long INSTALLED_APPS.  Nothing
+touches a database or the network.
+
+Every result is the best of several timed runs, in microseconds per
+operation.  Save a run and compare later runs against it to spot
+regressions::
+
+    python benchmarks/run.py --save before.json
+    python benchmarks/run.py --compare before.json
+
+Use --quick for a faster, noisier run and --only to pick benchmarks
+whose names start with the given prefix.
+"""
+from __future__ import print_function
+
+import json
+import optparse
+import sys
+import timeit
+import unittest
+from contextlib import contextmanager
+
+from django.conf import global_settings, settings
+if not settings.configured:
+    settings.configure(INSTALLED_APPS=['django.contrib.sites'])
+
+from override_settings import (
+    override_settings, override_class_settings, with_apps, without_apps,
+    clear_global_settings_cache)
+
+REPEAT = 5
+SCALE = 1.0
+
+def timed(func, number):
+    """
+    Return the best time per call of `func`, in microseconds.
+    """
+    number = max(1, int(number * SCALE))
+    return min(timeit.repeat(func, number=number, repeat=REPEAT)) / number * 1e6
+
+class Defaults(object):
+    """
+    A settings object with `size` made-up settings.
+    """
+    DEBUG = False
+
+    def __init__(self, size, **extra):
+        for i in range(size):
+            setattr(self, 'SETTING_%d' % i, i)
+        for key, value in extra.items():
+            setattr(self, key, value)
+
+@contextmanager
+def real_settings(wrapped):
+    """
+    Use `wrapped` as the real settings while no overrides are enabled.
+    """
+    original = settings._wrapped
+    settings._wrapped = wrapped
+    try:
+        yield
+    finally:
+        settings._wrapped = original
+
+@contextmanager
+def global_defaults(size):
+    """
+    Add `size` made-up settings to django.conf.global_settings.
+    """
+    names = ['GLOBAL_SETTING_%d' % i for i in range(size)]
+    for i, name in enumerate(names):
+        setattr(global_settings, name, i)
+    clear_global_settings_cache()
+    try:
+        yield
+    finally:
+        for name in names:
+            delattr(global_settings, name)
+        clear_global_settings_cache()
+
+def bench_construct():
+    for size in (100, 1000, 10000):
+        with global_defaults(size):
+            yield ('construct/global-defaults=%d' % size,
+                   lambda: override_settings(FOO=1), 20000)
+            override = override_settings(FOO=1)
+            yield ('options/global-defaults=%d' % size,
+                   lambda: override.options, 200)
+    for keys in (1, 10, 100):
+        options = dict(('FOO_%d' % i, i) for i in range(keys))
+        yield ('construct/keys=%d' % keys,
+               lambda: override_settings(**options), 5000)
+
+def bench_enable():
+    for size in (100, 10000):
+        with real_settings(Defaults(size)):
+            override = override_settings(FOO=1)
+            def enter_exit():
+                with override:
+                    pass
+            yield 'enable/defaults=%d' % size, enter_exit, 20000
+    for keys in (1, 10, 100):
+        override = override_settings(**dict(('FOO_%d' % i, i) for i in range(keys)))
+        def enter_exit():
+            with override:
+                pass
+        yield 'enable/keys=%d' % keys, enter_exit, 5000
+
+@contextmanager
+def nested(depth):
+    overrides = [override_settings(FOO=i, **{'LEVEL_%d' % i: i})
+                 for i in range(depth)]
+    for override in overrides:
+        override.enable()
+    try:
+        yield
+    finally:
+        for override in reversed(overrides):
+            override.disable()
+
+def bench_nested():
+    override = override_settings(FOO='top')
+    def enter_exit():
+        with override:
+            pass
+    for depth in (0, 10, 100):
+        with nested(depth):
+            yield 'nested-enable/depth=%d' % depth, enter_exit, 20000
+
+def bench_read():
+    def read_overridden():
+        settings.FOO
+    def read_default():
+        settings.INSTALLED_APPS
+    for depth in (0, 1, 10, 50):
+        with nested(depth):
+            if depth:
+                yield 'read-overridden/depth=%d' % depth, read_overridden, 200000
+            yield 'read-default/depth=%d' % depth, read_default, 200000
+
+def make_case(methods, decorator):
+    def test(self):
+        settings.FOO
+    attrs = dict(('test_%d' % i, test) for i in range(methods))
+    return decorator(type('Case', (unittest.TestCase,), attrs))
+
+def run_case(case):
+    suite = unittest.TestLoader().loadTestsFromTestCase(case)
+    suite.run(unittest.TestResult())
+
+def bench_classes():
+    for methods in (10, 100, 1000):
+        number = max(1, 20000 // methods)
+        for name, decorator in (('per-test', override_settings(FOO=1)),
+                                ('per-class', override_class_settings(FOO=1))):
+            yield ('decorate-class/%s/methods=%d' % (name, methods),
+                   lambda: make_case(methods, decorator), number)
+            case = make_case(methods, decorator)
+            yield ('run-class/%s/methods=%d' % (name, methods),
+                   lambda: run_case(case), number)
+
+def bench_apps():
+    for size in (10, 100, 1000):
+        apps = ['app_%d' % i for i in range(size)]
+        with real_settings(Defaults(0, INSTALLED_APPS=apps)):
+            for name, override in (('with', with_apps('extra_app')),
+                                   ('without', without_apps('app_0'))):
+                def enter_exit():
+                    with override:
+                        pass
+                yield '%s-apps/installed=%d' % (name, size), enter_exit, 2000
+
+BENCHMARKS = [bench_construct, bench_enable, bench_nested, bench_read,
+              bench_classes, bench_apps]
+
+def run(only=()):
+    results = []
+    for benchmark in BENCHMARKS:
+        # Each benchmark yields (name, function, number of calls) and
+        # is timed before the generator moves on, while any settings it
+        # set up are still in place.
+        for name, func, number in benchmark():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            usec = timed(func, number)
+            results.append((name, usec))
+            print('%-45s %12.3f usec' % (name, usec))
+            sys.stdout.flush()
+    return results
+
+def compare(results, baseline, threshold):
+    """
+    Print the change from `baseline` for each result and return the
+    names of those that got slower by more than `threshold` percent.
+    """
+    print()
+    print('%-45s %12s %12s %8s' % ('benchmark', 'before', 'after', 'change'))
+    slower = []
+    for name, usec in results:
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        change = (usec - before) / before * 100
+        flag = ''
+        if change > threshold:
+            slower.append(name)
+            flag = '  slower'
+        print('%-45s %12.3f %12.3f %+7.1f%%%s' % (name, before, usec, change, flag))
+    return slower
+
+def main(argv=None):
+    global REPEAT, SCALE
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('--save', metavar='FILE',
+                      help='write the results to FILE as JSON')
+    parser.add_option('--compare', metavar='FILE',
+                      help='compare the results with a file written by --save')
+    parser.add_option('--threshold', type='float', default=10.0,
+                      help='percent slowdown reported as a regression [%default]')
+    parser.add_option('--only', action='append', default=[], metavar='PREFIX',
+                      help='only run benchmarks whose names start with PREFIX')
+    parser.add_option('--quick', action='store_true',
+                      help='do fewer runs; faster but noisier')
+    options, args = parser.parse_args(argv)
+    if options.quick:
+        REPEAT, SCALE = 2, 0.1
+
+    results = run(options.only)
+    if options.save:
+        f = open(options.save, 'w')
+        try:
+            json.dump(dict(results), f, indent=2, sort_keys=True)
+        finally:
+            f.close()
+    if options.compare:
+        f = open(options.compare)
+        try:
+            baseline = json.load(f)
+        finally:
+            f.close()
+        if compare(results, baseline, options.threshold):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
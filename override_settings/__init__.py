@@ -1,61 +1,731 @@
 import copy
 import mock
+import sys
+import threading
 from functools import wraps
 from django.conf import global_settings, settings
+from override_settings.signals import setting_changed
+
+try:
+    import contextvars
+except ImportError:
+    contextvars = None
+
+if sys.version_info >= (3, 5):
+    from override_settings._async import (
+        AsyncOverrideMixin, iscoroutinefunction, wrap_coroutine_function)
+else:
+    AsyncOverrideMixin = object
+    iscoroutinefunction = lambda func: False
 
 SETTING_DELETED = mock.sentinel.SETTING_DELETED
 
-class override_settings(object):
+_global_settings = None
+
+def get_global_settings():
+    """
+    Return a dictionary of all global_settings values.
+
+    The dictionary is built the first time it's needed and shared by
+    every override_settings instance afterwards, so treat it as
+    read-only.  Call `clear_global_settings_cache` if
+    django.conf.global_settings is changed at runtime.
+    """
+    global _global_settings
+    if _global_settings is None:
+        _global_settings = dict((key, getattr(global_settings, key))
+                                for key in dir(global_settings) if key.isupper())
+    return _global_settings
+
+def clear_global_settings_cache():
+    """
+    Throw away the cached global_settings snapshot.
+
+    It will be rebuilt on the next call to `get_global_settings`.
+    """
+    global _global_settings
+    _global_settings = None
+
+class SettingTransform(object):
+    """
+    An override value that is worked out from the setting's current
+    value each time the override is enabled.
+
+    Subclasses implement `apply`, which is passed the current value (or
+    SETTING_DELETED if the setting isn't defined) and returns the new
+    one.  They should compare and hash by their contents so deltas
+    using them can be compared.
+    """
+    def apply(self, value):
+        raise NotImplementedError
+
+def _freeze(value):
+    """
+    Return a hashable stand-in for `value`.
+
+    Dicts, lists, tuples and sets are converted recursively.  Anything
+    else that can't be hashed is represented by its type and repr().
+    """
+    if isinstance(value, dict):
+        items = sorted(value.items(), key=lambda item: repr(item[0]))
+        return (dict, tuple((key, _freeze(v)) for key, v in items))
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_freeze(v) for v in value))
+    if isinstance(value, (set, frozenset)):
+        return (frozenset, frozenset(_freeze(v) for v in value))
+    try:
+        hash(value)
+    except TypeError:
+        return (type(value), repr(value))
+    return value
+
+class SettingsDelta(object):
+    """
+    An immutable set of setting overrides.
+
+    Deltas compare and hash by their contents, so equal overrides built
+    in different places are interchangeable.  The same delta can be
+    pushed onto the settings stack any number of times.
+    """
+    __slots__ = ('_options', '_frozen')
+
+    def __init__(self, options):
+        object.__setattr__(self, '_options', dict(options))
+        object.__setattr__(self, '_frozen', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SettingsDelta objects are immutable")
+
+    def __getitem__(self, key):
+        return self._options[key]
+
+    def __contains__(self, key):
+        return key in self._options
+
+    def __iter__(self):
+        return iter(self._options)
+
+    def __len__(self):
+        return len(self._options)
+
+    def keys(self):
+        return list(self._options)
+
+    def items(self):
+        return list(self._options.items())
+
+    def frozen(self):
+        """
+        Return the hashable form of the delta's options.
+        """
+        if self._frozen is None:
+            object.__setattr__(self, '_frozen', _freeze(self._options))
+        return self._frozen
+
+    def __hash__(self):
+        return hash(self.frozen())
+
+    def __eq__(self, other):
+        if not isinstance(other, SettingsDelta):
+            return NotImplemented
+        return self is other or self.frozen() == other.frozen()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __repr__(self):
+        return 'SettingsDelta(%r)' % (self._options,)
+
+_missing = object()
+
+# Pushed for tests whose class overrides are held, so anything they
+# assign is still thrown away after each test.
+_NO_CHANGES = SettingsDelta({})
+
+def _differs(old, new):
+    """
+    Return True unless `old` and `new` are the same or equal.
+    """
+    if old is new:
+        return False
+    try:
+        return not (old == new)
+    except Exception:
+        return True
+
+class LayeredSettings(object):
+    """
+    Stands in for the real settings object while overrides are enabled.
+
+    Every enabled override pushes its SettingsDelta onto a stack, and
+    the delta's options are applied to a flattened view kept in the
+    instance's __dict__, so reading an overridden setting is a plain
+    attribute lookup.  Anything else is read from the real settings.
+
+    Pushing a layer records what it replaced, so popping it only has
+    to put those settings back.  Both cost time proportional to the
+    number of settings in the layer, however deep the stack is.
+    """
+    __slots__ = ('_wrapped', '_layers', '_undo', '_deleted', '__dict__')
+
+    def __init__(self, wrapped):
+        object.__setattr__(self, '_wrapped', wrapped)
+        object.__setattr__(self, '_layers', [])
+        # What each layer replaced: key -> (flattened value, deleted?)
+        object.__setattr__(self, '_undo', [])
+        object.__setattr__(self, '_deleted', set())
+
+    def push(self, delta):
+        """
+        Apply `delta` on top of the stack.
+
+        Return (key, value) pairs for the settings whose effective
+        value changed, with _missing for settings that are now gone.
+        """
+        self._layers.append(delta)
+        self._undo.append({})
+        try:
+            return self._apply(delta)
+        except:
+            self._layers.pop()
+            self._restore(self._undo.pop())
+            raise
+
+    def pop(self, delta):
+        """
+        Remove `delta` from the top of the stack.
+
+        Return (key, value) pairs like push().
+        """
+        if not self._layers or self._layers[-1] is not delta:
+            raise RuntimeError("Overrides must be disabled in the reverse "
+                               "order they were enabled")
+        self._layers.pop()
+        return self._restore(self._undo.pop())
+
+    def _restore(self, undo):
+        flat, deleted = self.__dict__, self._deleted
+        changes = []
+        for key, (value, was_deleted) in undo.items():
+            old = self._effective(key)
+            if value is _missing:
+                flat.pop(key, None)
+            else:
+                flat[key] = value
+            if was_deleted:
+                deleted.add(key)
+            else:
+                deleted.discard(key)
+            new = self._effective(key)
+            if _differs(old, new):
+                changes.append((key, new))
+        return changes
+
+    def _effective(self, key):
+        if key in self.__dict__:
+            return self.__dict__[key]
+        if key in self._deleted:
+            return _missing
+        return getattr(self._wrapped, key, _missing)
+
+    def _apply(self, options):
+        flat, deleted, undo = self.__dict__, self._deleted, self._undo[-1]
+        changes = []
+        for key in options:
+            value = options[key]
+            old = self._effective(key)
+            if isinstance(value, SettingTransform):
+                value = value.apply(SETTING_DELETED if old is _missing else old)
+            if key not in undo:
+                undo[key] = (flat.get(key, _missing), key in deleted)
+            if value is SETTING_DELETED:
+                flat.pop(key, None)
+                deleted.add(key)
+                value = _missing
+            else:
+                flat[key] = value
+                deleted.discard(key)
+            if _differs(old, value):
+                changes.append((key, value))
+        return changes
+
+    def __getattr__(self, name):
+        # Only reached for names that aren't in the flattened view.
+        # Values read from the real settings are kept there too; they
+        # can't change underneath us.  Unknown names raise
+        # AttributeError straight from the real settings and aren't
+        # remembered.
+        if name in self._deleted:
+            raise AttributeError(name)
+        value = getattr(self._wrapped, name)
+        self.__dict__[name] = value
+        return value
+
+    def __setattr__(self, name, value):
+        # Anything set while an override is enabled goes away with it.
+        _notify(self._apply({name: value}), enter=True)
+
+    def __delattr__(self, name):
+        _notify(self._apply({name: SETTING_DELETED}), enter=True)
+
+    def __dir__(self):
+        names = set(dir(self._wrapped))
+        names.difference_update(self._deleted)
+        names.update(self.__dict__)
+        return sorted(names)
+
+class _LocalState(object):
+    """
+    One level of the override stack as seen by a single context.
+
+    Each level only holds the settings its own layer changed, with
+    _missing for deleted ones, and looks anything else up in the levels
+    beneath it.  Pushing a level costs time proportional to the number
+    of settings in its layer.
+    """
+    __slots__ = ('owner', 'parent', 'delta', 'values')
+
+    def __init__(self, owner, parent, delta, values=None):
+        self.owner = owner
+        self.parent = parent
+        self.delta = delta
+        if values is None:
+            self.values = {}
+            self.update(delta)
+        else:
+            self.values = values
+
+    def lookup(self, key):
+        state = self
+        while state is not None:
+            if key in state.values:
+                return state.values[key]
+            state = state.parent
+        return getattr(self.owner._wrapped, key, _missing)
+
+    def update(self, options):
+        for key in options:
+            value = options[key]
+            if isinstance(value, SettingTransform):
+                old = self.lookup(key)
+                value = value.apply(SETTING_DELETED if old is _missing else old)
+            if value is SETTING_DELETED:
+                value = _missing
+            self.values[key] = value
+
+if contextvars is not None:
+    _context_state = contextvars.ContextVar('override_settings', default=None)
+else:
+    _context_state = None
+
+class LocalLayeredSettings(object):
+    """
+    Like LayeredSettings, but every thread (or, where contextvars is
+    available, every execution context such as an asyncio task) has
+    its own override stack.
+
+    Contexts that haven't enabled any overrides see the real settings.
+    """
+    __slots__ = ('_wrapped', '_local')
+
+    def __init__(self, wrapped):
+        object.__setattr__(self, '_wrapped', wrapped)
+        object.__setattr__(self, '_local', threading.local())
+
+    def _get_state(self):
+        if _context_state is not None:
+            state = _context_state.get()
+        else:
+            state = getattr(self._local, 'state', None)
+        # Ignore anything left behind by an earlier instance.
+        if state is not None and state.owner is not self:
+            return None
+        return state
+
+    def _set_state(self, state):
+        if _context_state is not None:
+            _context_state.set(state)
+        else:
+            self._local.state = state
+
+    def push(self, delta):
+        parent = self._get_state()
+        state = _LocalState(self, parent, delta)
+        self._set_state(state)
+        return self._changes(state.values, parent, state)
+
+    def pop(self, delta):
+        state = self._get_state()
+        if state is None or state.delta is not delta:
+            raise RuntimeError("Overrides must be disabled in the reverse "
+                               "order they were enabled")
+        self._set_state(state.parent)
+        return self._changes(state.values, state, state.parent)
+
+    def _effective(self, state, key):
+        if state is None:
+            return getattr(self._wrapped, key, _missing)
+        return state.lookup(key)
+
+    def _changes(self, keys, before, after):
+        changes = []
+        for key in keys:
+            new = self._effective(after, key)
+            if _differs(self._effective(before, key), new):
+                changes.append((key, new))
+        return changes
+
+    def __getattr__(self, name):
+        state = self._get_state()
+        if state is None:
+            return getattr(self._wrapped, name)
+        value = state.lookup(name)
+        if value is _missing:
+            raise AttributeError(name)
+        return value
+
+    def _write(self, name, value):
+        # Replace the current level rather than changing it in place;
+        # it may be shared with contexts copied from this one.
+        state = self._get_state()
+        if state is None:
+            raise RuntimeError("Can't change settings in a context without "
+                               "an enabled override")
+        new_state = _LocalState(self, state.parent, state.delta, dict(state.values))
+        new_state.update({name: value})
+        self._set_state(new_state)
+        return self._changes([name], state, new_state)
+
+    def __setattr__(self, name, value):
+        _notify(self._write(name, value), enter=True)
+
+    def __delattr__(self, name):
+        _notify(self._write(name, SETTING_DELETED), enter=True)
+
+    def __dir__(self):
+        names = set(dir(self._wrapped))
+        levels = []
+        state = self._get_state()
+        while state is not None:
+            levels.append(state)
+            state = state.parent
+        for state in reversed(levels):
+            for key, value in state.values.items():
+                if value is _missing:
+                    names.discard(key)
+                else:
+                    names.add(key)
+        return sorted(names)
+
+class _UncachedDict(dict):
+    """
+    The __dict__ of django.conf.settings while the context scope is in
+    use.
+
+    From Django 3.1, LazySettings keeps every setting it reads in its
+    __dict__, so the first context to read a setting would decide its
+    value for every other context.  Settings written here are dropped.
+    """
+    def __setitem__(self, key, value):
+        if not key.isupper():
+            dict.__setitem__(self, key, value)
+
+def _cache_settings(enabled):
+    # Anything already cached goes either way.
+    attrs = dict((key, value) for key, value in vars(settings).items()
+                 if not key.isupper())
+    if not enabled:
+        attrs = _UncachedDict(attrs)
+    object.__setattr__(settings, '__dict__', attrs)
+
+GLOBAL_SCOPE = 'global'
+CONTEXT_SCOPE = 'context'
+
+_scope = GLOBAL_SCOPE
+_profiler = None
+# The layered settings the next override is pushed onto.
+_layered = None
+# (layered settings, what settings._wrapped was before) for each
+# enabled override, innermost last.  The context scope only has one.
+_installed = []
+_enabled = 0
+_lock = threading.Lock()
+
+def set_scope(scope):
+    """
+    Choose whether overrides apply to the whole process
+    (GLOBAL_SCOPE, the default) or only to the thread or execution
+    context that enabled them (CONTEXT_SCOPE).
+
+    The scope can only be changed while no overrides are enabled.
+    """
+    global _scope
+    if scope not in (GLOBAL_SCOPE, CONTEXT_SCOPE):
+        raise ValueError("Unknown scope: %r" % (scope,))
+    _lock.acquire()
+    try:
+        if _enabled:
+            raise RuntimeError("Can't change scope while overrides are enabled")
+        _scope = scope
+        _cache_settings(scope == GLOBAL_SCOPE)
+    finally:
+        _lock.release()
+
+def get_scope():
+    return _scope
+
+def set_profiler(profiler):
+    """
+    Install `profiler` to time every override enabled or disabled
+    through override_settings, or remove it with None.
+
+    See override_settings.profiling.Profiler.
+    """
+    global _profiler
+    _profiler = profiler
+
+def get_profiler():
+    return _profiler
+
+def _caller_site():
+    """
+    Return "filename:line" for the first caller outside this package.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module != __name__ and not module.startswith(__name__ + '.'):
+            return '%s:%d' % (frame.f_code.co_filename, frame.f_lineno)
+        frame = frame.f_back
+    return None
+
+def _real_settings():
+    """
+    Return the settings object overrides are put in front of.
+
+    If settings haven't been configured we fall back to the global
+    defaults, just like a bare override_settings always has.
+    """
+    if _installed:
+        return _installed[0][0]._wrapped
+    try:
+        getattr(settings, 'DEBUG')
+    except ImportError:
+        return global_settings
+    return settings._wrapped
+
+def _notify(changes, enter, sender=None):
+    # Always sent by the real settings' class, whatever is in front of
+    # them, so receivers connected with a sender hear both ways.
+    if changes and sender is None:
+        sender = _real_settings().__class__
+    for key, value in changes:
+        if value is _missing:
+            value = None
+        setting_changed.send(sender=sender, setting=key, value=value, enter=enter)
+
+def _layered_settings(wrapped):
+    if _scope == CONTEXT_SCOPE:
+        return LocalLayeredSettings(wrapped)
+    if _profiler is not None:
+        return _profiler.settings_class(wrapped)
+    return LayeredSettings(wrapped)
+
+def push_layer(delta):
+    """
+    Put `delta` in front of the current settings.
+
+    If something else, like Django's own override_settings, has replaced
+    settings._wrapped since our last override, `delta` is layered over
+    that instead.  setting_changed is sent for each setting whose value
+    changed.
+    """
+    global _layered, _enabled
+    _lock.acquire()
+    try:
+        sender = _real_settings().__class__
+        if _layered is None:
+            layered = _layered_settings(_real_settings())
+        elif _scope == GLOBAL_SCOPE and settings._wrapped is not _layered:
+            layered = _layered_settings(settings._wrapped)
+        else:
+            layered = _layered
+        changes = layered.push(delta)
+        if _scope == GLOBAL_SCOPE or _layered is None:
+            _installed.append((layered, settings._wrapped))
+        _layered = layered
+        _enabled += 1
+        settings._wrapped = layered
+    finally:
+        _lock.release()
+    _notify(changes, enter=True, sender=sender)
+    return layered
+
+def pop_layer(delta):
+    """
+    Remove `delta`, which must be the most recently pushed layer.
+
+    settings._wrapped is put back to whatever it was before `delta` was
+    pushed (in the context scope, before the first override was).
+    setting_changed is sent for each setting whose value changed.
+    """
+    global _layered, _enabled
+    _lock.acquire()
+    try:
+        if _layered is None:
+            raise RuntimeError("No overrides are enabled")
+        sender = _real_settings().__class__
+        layered, previous = _installed[-1]
+        changes = layered.pop(delta)
+        _enabled -= 1
+        if _scope == GLOBAL_SCOPE or not _enabled:
+            _installed.pop()
+            settings._wrapped = previous
+            _layered = _installed[-1][0] if _installed else None
+    finally:
+        _lock.release()
+    _notify(changes, enter=False, sender=sender)
+
+# Name of the attribute holding the overrides applied by decorators.
+OVERRIDES_ATTR = '_override_settings'
+
+# TestCase classes whose class-level overrides a test runner is keeping
+# enabled for them (see override_settings.runner.SettingsGroup), so
+# their decorators leave them alone.
+_held_classes = set()
+# (class, override) for each per-class override that wasn't enabled in
+# setUpClass because the class was held, so tearDownClass knows.
+_held_per_class = set()
+
+class override_settings(AsyncOverrideMixin):
+    # Enable the override once per class instead of once per test when
+    # decorating a TestCase.  See override_class_settings.
+    per_class = False
+
+    # Where the override was created, if a profiler was installed.
+    site = None
+
     def __init__(self, **kwargs):
-        self.options = self.get_global_settings()
-        self.options.update(kwargs)
-        self.patcher = mock.patch.object(settings, '_wrapped', **self.options)
+        # Most overrides are created by decorators when tests are
+        # imported, so only keep the options until the first use.
+        self._options = kwargs
+        if _profiler is not None:
+            self.site = _caller_site()
+
+    @property
+    def delta(self):
+        """
+        The SettingsDelta for these options, built on first use.
+        """
+        delta = self.__dict__.get('_delta')
+        if delta is None:
+            # setdefault() so concurrent first uses agree on one delta.
+            delta = self.__dict__.setdefault('_delta', SettingsDelta(self._options))
+        return delta
+
+    @property
+    def overrides(self):
+        """
+        Return a dictionary of just the overridden settings.
+        """
+        return dict(self._options)
+
+    @property
+    def options(self):
+        """
+        Return the global defaults merged with the overrides.
+        """
+        options = self.get_global_settings()
+        options.update(self.overrides)
+        return options
 
     def get_global_settings(self):
         """
         Return a dictionary of all global_settings values.
         """
-        return dict((key, getattr(global_settings, key)) for key in dir(global_settings)
-                    if key.isupper())
+        return dict(get_global_settings())
 
     def __call__(self, test_func):
         if isinstance(test_func, type):
-            def _pre_setup(innerself):
-                self.enable()
-                test_func.setUp(innerself)
-            def _post_teardown(innerself):
-                test_func.tearDown(innerself)
-                self.disable()
+            # Python 2.6's unittest never calls setUpClass.
+            if self.per_class and hasattr(test_func, 'setUpClass'):
+                def _set_up_class(cls):
+                    if cls in _held_classes:
+                        _held_per_class.add((cls, self))
+                    else:
+                        self.enable()
+                    try:
+                        super(inner, cls).setUpClass()
+                    except:
+                        _disable_class(cls)
+                        raise
+                def _tear_down_class(cls):
+                    try:
+                        super(inner, cls).tearDownClass()
+                    finally:
+                        _disable_class(cls)
+                def _disable_class(cls):
+                    if (cls, self) in _held_per_class:
+                        _held_per_class.discard((cls, self))
+                    else:
+                        self.disable()
+                attrs = {
+                    'setUpClass': classmethod(_set_up_class),
+                    'tearDownClass': classmethod(_tear_down_class),
+                }
+            else:
+                def _pre_setup(innerself):
+                    if type(innerself) in _held_classes:
+                        push_layer(_NO_CHANGES)
+                    else:
+                        self.enable()
+                    test_func.setUp(innerself)
+                def _post_teardown(innerself):
+                    test_func.tearDown(innerself)
+                    if type(innerself) in _held_classes:
+                        pop_layer(_NO_CHANGES)
+                    else:
+                        self.disable()
+                attrs = {
+                    'setUp': _pre_setup,
+                    'tearDown': _post_teardown,
+                }
+            attrs['__module__'] = test_func.__module__
+            attrs[OVERRIDES_ATTR] = self._overrides_for(test_func)
 
             # When decorating a class, we need to construct a new class
             # with the same name so that the test discovery tools can
             # get a useful name.
-            inner = type(
-                test_func.__name__,
-                (test_func,),
-                {
-                    'setUp': _pre_setup,
-                    'tearDown': _post_teardown,
-                    '__module__': test_func.__module__,
-                })
+            inner = type(test_func.__name__, (test_func,), attrs)
             return inner
+        elif iscoroutinefunction(test_func):
+            inner = wrap_coroutine_function(self, test_func)
         else:
             @wraps(test_func)
             def inner(*args, **kwargs):
                 with self:
                     return test_func(*args, **kwargs)
-            return inner
+        setattr(inner, OVERRIDES_ATTR, self._overrides_for(test_func))
+        return inner
+
+    def _overrides_for(self, test_func):
+        # Record the overrides that apply to the decorated object,
+        # outermost first, so test runners can tell which tests share
+        # settings.
+        return (self,) + getattr(test_func, OVERRIDES_ATTR, ())
 
     def enable(self):
-        self.mocked = self.patcher.start()
-        # Delete attributes set to SETTING_DELETED
-        for key, value in self.options.iteritems():
-            if value is SETTING_DELETED:
-                delattr(self.mocked, key)
-        return self.mocked
+        if _profiler is not None:
+            return _profiler.enable(self)
+        return push_layer(self.delta)
 
     def disable(self):
-        self.patcher.stop()
+        if _profiler is not None:
+            return _profiler.disable(self)
+        pop_layer(self.delta)
 
     def __enter__(self):
         self.enable()
@@ -63,19 +733,192 @@ class override_settings(object):
     def __exit__(self, exc_type, exc_value, traceback):
         self.disable()
 
+class override_class_settings(override_settings):
+    """
+    Like override_settings, but a decorated TestCase only enables the
+    override once, in setUpClass, and disables it in tearDownClass.
+
+    Method decorators and context managers still stack on top of it.
+    Anything assigned to settings in one test is seen by the tests that
+    run after it in the same class, or in the same group when a test
+    runner groups classes by their overrides.
+
+    Classes without setUpClass, like Python 2.6's unittest.TestCase,
+    fall back to enabling the override for each test.
+    """
+    per_class = True
+
+class NestedChange(SettingTransform):
+    """
+    Change values inside a dict setting, such as DATABASES or LOGGING,
+    without copying all of it.
+
+    `changes` maps paths (tuples of keys) to new values, or to
+    SETTING_DELETED to remove that key.  Only the dicts along each path
+    are copied; everything else is shared with the current value, which
+    is left untouched.  Missing dicts along a path are created.
+    """
+    def __init__(self, changes):
+        # Shorter paths first, so changes below a replaced dict land in
+        # (a copy of) the replacement.
+        self.changes = tuple(sorted(((tuple(path), value)
+                                     for path, value in changes.items()),
+                                    key=lambda change: len(change[0])))
+
+    def apply(self, value):
+        if value is SETTING_DELETED:
+            value = {}
+        root = copy.copy(value)
+        copies = set([id(root)])
+        for path, new in self.changes:
+            node = root
+            for key in path[:-1]:
+                if key not in node:
+                    child = {}
+                else:
+                    child = node[key]
+                    if not isinstance(child, dict):
+                        raise TypeError("Can't change %r inside %r, which "
+                                        "isn't a dict" % (path, child))
+                    if id(child) not in copies:
+                        child = copy.copy(child)
+                copies.add(id(child))
+                node[key] = node = child
+            if new is SETTING_DELETED:
+                node.pop(path[-1], None)
+            else:
+                node[path[-1]] = new
+        return root
+
+    def __eq__(self, other):
+        return (isinstance(other, NestedChange) and
+                _freeze(self.changes) == _freeze(other.changes))
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(_freeze(self.changes))
+
+    def __repr__(self):
+        return 'NestedChange(%r)' % (dict(self.changes),)
+
+def override_nested(**kwargs):
+    """
+    Override values inside dict settings, naming each one by its path
+    joined with double underscores::
+
+        @override_nested(DATABASES__default__NAME='other.db')
+
+    Returns an override_settings that changes just those values; see
+    NestedChange.
+    """
+    changes = {}
+    for name, value in kwargs.items():
+        path = name.split('__')
+        if len(path) < 2:
+            raise ValueError("%r doesn't name a value inside a setting" % name)
+        changes.setdefault(path[0], {})[tuple(path[1:])] = value
+    return override_settings(**dict((setting, NestedChange(paths))
+                                    for setting, paths in changes.items()))
+
+class SequenceChange(SettingTransform):
+    """
+    Change a list or tuple setting, such as MIDDLEWARE_CLASSES or
+    AUTHENTICATION_BACKENDS, with operations applied in order to its
+    value when the override is enabled::
+
+        SequenceChange().remove('a.Middleware').insert_after('b.Middleware', 'c.Middleware')
+
+    Each method returns a new SequenceChange with one more operation.
+    Appended and prepended items that are already present keep their
+    place; inserted items are moved next to the anchor.  The result is
+    a tuple if the setting was a tuple, and a list otherwise.
+    """
+    def __init__(self, operations=()):
+        self.operations = tuple(operations)
+
+    def _then(self, *operation):
+        return SequenceChange(self.operations + (operation,))
+
+    def append(self, *items):
+        return self._then('append', *items)
+
+    def prepend(self, *items):
+        return self._then('prepend', *items)
+
+    def insert_before(self, anchor, *items):
+        return self._then('insert_before', anchor, *items)
+
+    def insert_after(self, anchor, *items):
+        return self._then('insert_after', anchor, *items)
+
+    def remove(self, *items):
+        return self._then('remove', *items)
+
+    def apply(self, value):
+        if value is SETTING_DELETED:
+            value = ()
+        items = list(value)
+        for operation in self.operations:
+            name, args = operation[0], operation[1:]
+            if name == 'remove':
+                items = [item for item in items if item not in args]
+            elif name in ('append', 'prepend'):
+                new = []
+                for item in args:
+                    if item not in items and item not in new:
+                        new.append(item)
+                if name == 'append':
+                    items.extend(new)
+                else:
+                    items[:0] = new
+            else:
+                anchor, new = args[0], args[1:]
+                items = [item for item in items if item not in new]
+                try:
+                    index = items.index(anchor)
+                except ValueError:
+                    raise ValueError("Can't insert next to %r, which isn't in %r"
+                                     % (anchor, value))
+                if name == 'insert_after':
+                    index += 1
+                items[index:index] = new
+        if isinstance(value, tuple):
+            return tuple(items)
+        return items
+
+    def __eq__(self, other):
+        return (isinstance(other, SequenceChange) and
+                _freeze(self.operations) == _freeze(other.operations))
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(_freeze(self.operations))
+
+    def __repr__(self):
+        return 'SequenceChange()' + ''.join(
+            '.%s(%s)' % (operation[0], ', '.join(map(repr, operation[1:])))
+            for operation in self.operations)
+
 def with_apps(*apps):
     """
     Class decorator that makes sure the passed apps are present in
     INSTALLED_APPS.
+
+    The apps are appended to whatever INSTALLED_APPS is when the
+    override is enabled.
     """
-    apps_set = set(settings.INSTALLED_APPS)
-    apps_set.update(apps)
-    return override_settings(INSTALLED_APPS=list(apps_set))
+    return override_settings(INSTALLED_APPS=SequenceChange().append(*apps))
 
 def without_apps(*apps):
     """
     Class decorator that makes sure the passed apps are not present in
     INSTALLED_APPS.
+
+    The apps are removed from whatever INSTALLED_APPS is when the
+    override is enabled.
     """
-    apps_list = [a for a in settings.INSTALLED_APPS if a not in apps]
-    return override_settings(INSTALLED_APPS=apps_list)
+    return override_settings(INSTALLED_APPS=SequenceChange().remove(*apps))
@@ -0,0 +1,26 @@
+"""
+Coroutine support for override_settings.
+
+This lives in its own module because the syntax isn't available before
+Python 3.5; the package only imports it where it is.
+"""
+from functools import wraps
+from inspect import iscoroutinefunction
+
+class AsyncOverrideMixin(object):
+    async def __aenter__(self):
+        self.enable()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.disable()
+
+def wrap_coroutine_function(override, func):
+    """
+    Wrap `func` so the override stays enabled until its coroutine is
+    finished, not just until it is created.
+    """
+    @wraps(func)
+    async def inner(*args, **kwargs):
+        with override:
+            return await func(*args, **kwargs)
+    return inner
@@ -0,0 +1,77 @@
+class LRUCache(object):
+    """
+    Values keyed by anything hashable, keeping at most ``size``.
+
+    Adding a value to a full cache drops the least recently used one
+    and passes it to ``on_evict``.  Pinned keys are never dropped, so
+    the cache can grow past ``size`` while they're in use.
+    """
+    def __init__(self, size, on_evict=None):
+        self.size = size
+        self.on_evict = on_evict
+        # key -> [last use, value]
+        self._entries = {}
+        # key -> number of pins
+        self._pins = {}
+        self._clock = 0
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        entry[0] = self._tick()
+        return entry[1]
+
+    def put(self, key, value):
+        self._entries[key] = [self._tick(), value]
+        self._evict()
+
+    def pop(self, key, default=None):
+        """
+        Remove ``key`` and return its value, without passing it to
+        ``on_evict``.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return default
+        return entry[1]
+
+    def pin(self, key):
+        self._pins[key] = self._pins.get(key, 0) + 1
+
+    def unpin(self, key):
+        count = self._pins.get(key, 0) - 1
+        if count > 0:
+            self._pins[key] = count
+        else:
+            self._pins.pop(key, None)
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.size:
+            unpinned = [(entry[0], key) for key, entry in self._entries.items()
+                        if key not in self._pins]
+            if not unpinned:
+                return
+            value = self._entries.pop(min(unpinned)[1])[1]
+            if self.on_evict is not None:
+                self.on_evict(value)
+
+    def clear(self):
+        """
+        Drop every value, passing each to ``on_evict``.  Pins are kept.
+        """
+        entries, self._entries = self._entries, {}
+        if self.on_evict is not None:
+            for last_use, value in entries.values():
+                self.on_evict(value)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
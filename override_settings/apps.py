@@ -0,0 +1,58 @@
+"""
+Keep Django's app cache in step with INSTALLED_APPS overrides.
+
+Connect the receiver to make apps added by an override available to
+get_app()/get_models(), and to hide the models of apps it removes::
+
+    from override_settings.apps import update_app_cache
+    from override_settings.signals import setting_changed
+
+    setting_changed.connect(update_app_cache)
+
+Only the apps that were added or removed are loaded or unloaded.  This
+works with the app cache in django.db.models.loading, which Django 1.7
+replaced; on later versions the receiver does nothing.
+"""
+try:
+    from django.db.models.loading import cache
+except ImportError:
+    cache = None
+
+def _app_name(models_module):
+    return models_module.__name__.rsplit('.', 1)[0]
+
+def update_app_cache(sender, setting, value, **kwargs):
+    """
+    setting_changed receiver that loads apps added to INSTALLED_APPS and
+    unloads apps removed from it.
+
+    Nothing is done until the app cache has been populated; it reads
+    INSTALLED_APPS itself when that happens.
+    """
+    if setting != 'INSTALLED_APPS' or cache is None or not cache.loaded:
+        return
+    installed = set(value or ())
+    cache.write_lock.acquire()
+    try:
+        loaded = set()
+        for models_module in list(cache.app_store):
+            app_name = _app_name(models_module)
+            if app_name in installed:
+                loaded.add(app_name)
+            else:
+                del cache.app_store[models_module]
+                cache.app_labels.pop(cache._label_for(models_module), None)
+                cache.handled.pop(app_name, None)
+        for app_name in value or ():
+            if app_name not in loaded and app_name not in cache.handled:
+                _load_app(app_name)
+        cache._get_models_cache.clear()
+    finally:
+        cache.write_lock.release()
+
+def _load_app(app_name):
+    models_module = cache.load_app(app_name)
+    if models_module is not None:
+        # load_app() numbers apps by how many are loaded, which can
+        # repeat a number still in use once apps have been unloaded.
+        cache.app_store[models_module] = max(cache.app_store.values()) + 1
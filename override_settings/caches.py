@@ -0,0 +1,200 @@
+"""
+Give CACHES overrides cache backends of their own.
+
+Django builds its cache backends from the real CACHES and goes on
+using them while CACHES is overridden.  Connect ``update_caches`` and
+each override gets backends built from its own configuration::
+
+    from override_settings.caches import update_caches
+    from override_settings.signals import setting_changed
+
+    setting_changed.connect(update_caches)
+
+A configuration used by many tests is built once: backends stay in
+``pool`` after their override is disabled, up to ``pool.size`` of them,
+and are only closed when they fall out.  Backends an enabled override
+is using never do.  Set ``pool.clear_on_enter`` to start every override
+with empty caches.  Disabling the last override puts the original
+backends back.
+
+Before Django 1.7 only ``django.core.cache.cache`` is replaced; code
+that imported it before the override was enabled keeps the original.
+"""
+import django.core.cache
+
+try:
+    from importlib import import_module
+except ImportError:
+    from django.utils.importlib import import_module
+
+from override_settings import _freeze, _real_settings
+from override_settings._lru import LRUCache
+
+try:
+    from django.core.cache import caches
+except ImportError:
+    caches = None
+
+def _create_backend(config):
+    params = dict(config)
+    backend = params.pop('BACKEND')
+    location = params.pop('LOCATION', '')
+    module_name, class_name = backend.rsplit('.', 1)
+    return getattr(import_module(module_name), class_name)(location, params)
+
+def _close(backend):
+    close = getattr(backend, 'close', None)
+    if close is not None:
+        close()
+
+class CachePool(object):
+    """
+    Cache backends keyed by alias and settings.
+
+    At most ``size`` backends are kept; the least recently used one that
+    isn't pinned is closed and dropped to make room for another.
+    """
+    def __init__(self, size=8, clear_on_enter=False):
+        self.clear_on_enter = clear_on_enter
+        self._backends = LRUCache(size, on_evict=_close)
+
+    def _get_size(self):
+        return self._backends.size
+
+    def _set_size(self, size):
+        self._backends.size = size
+
+    size = property(_get_size, _set_size)
+
+    def key(self, alias, config):
+        return (alias, _freeze(config))
+
+    def get(self, alias, config):
+        """
+        Return the backend for ``alias`` with these settings, building
+        it if it isn't in the pool.
+        """
+        key = self.key(alias, config)
+        backend = self._backends.get(key)
+        if backend is None:
+            backend = _create_backend(config)
+            self._backends.put(key, backend)
+        return backend
+
+    def pin(self, alias, config):
+        """
+        Keep the backend for ``alias`` with these settings until it's
+        unpinned as often as it was pinned.
+        """
+        self._backends.pin(self.key(alias, config))
+
+    def unpin(self, alias, config):
+        self._backends.unpin(self.key(alias, config))
+
+    def clear(self):
+        """
+        Close and drop every backend.
+        """
+        self._backends.clear()
+
+    def __len__(self):
+        return len(self._backends)
+
+pool = CachePool()
+
+# The backends that were in use before the first CACHES override.
+_originals = None
+
+# Every CACHES value bound since the real one, innermost last.  Their
+# backends stay pinned until the override using them is disabled.
+_stack = []
+
+def update_caches(sender, setting, value, enter=True, **kwargs):
+    """
+    setting_changed receiver that binds pooled backends matching the
+    new value of CACHES, or the original backends once CACHES is back
+    to the real setting.
+    """
+    global _originals
+    if setting != 'CACHES':
+        return
+    if value is getattr(_real_settings(), 'CACHES', None):
+        _unwind(0)
+        if _originals is not None:
+            _bind(_originals)
+            _originals = None
+        return
+    if _originals is None:
+        _originals = _bound()
+    value = value or {}
+    level = None
+    if not enter:
+        # Going back out to an outer override's value, whose backends
+        # are still pinned.
+        for index, (bound, configs) in enumerate(_stack):
+            if bound is value:
+                level = index
+    if level is None:
+        for alias, config in value.items():
+            pool.pin(alias, config)
+        _stack.append((value, list(value.items())))
+    else:
+        _unwind(level + 1)
+    backends = {}
+    for alias, config in value.items():
+        backends[alias] = pool.get(alias, config)
+        if enter and pool.clear_on_enter:
+            backends[alias].clear()
+    _bind(backends)
+
+def _unwind(depth):
+    while len(_stack) > depth:
+        value, configs = _stack.pop()
+        for alias, config in configs:
+            pool.unpin(alias, config)
+
+# Django 1.7 added a thread-local handler for all the aliases, keeping
+# them in a dict until 3.2 made each alias an attribute of its own.
+# Django 1.8+ throws the thread local away when CACHES changes, before
+# this receiver runs, so keep hold of it to find the original backends.
+if caches is None:
+    _LOCAL_ATTR = None
+elif hasattr(caches, '_connections'):
+    _LOCAL_ATTR = '_connections'
+else:
+    _LOCAL_ATTR = '_caches'
+
+_local = getattr(caches, _LOCAL_ATTR) if _LOCAL_ATTR else None
+
+def _read(local):
+    if _LOCAL_ATTR == '_caches':
+        return dict(getattr(local, 'caches', {}))
+    backends = {}
+    for alias in getattr(_real_settings(), 'CACHES', {}):
+        backend = getattr(local, alias, None)
+        if backend is not None:
+            backends[alias] = backend
+    return backends
+
+def _bound():
+    if caches is None:
+        return {'default': django.core.cache.cache}
+    for local in (getattr(caches, _LOCAL_ATTR), _local):
+        backends = _read(local)
+        if backends:
+            return backends
+    return {}
+
+def _bind(backends):
+    global _local
+    if caches is None:
+        if 'default' in backends:
+            django.core.cache.cache = backends['default']
+        return
+    local = getattr(caches, _LOCAL_ATTR)
+    if _LOCAL_ATTR == '_caches':
+        local.caches = dict(backends)
+    else:
+        for alias, backend in backends.items():
+            setattr(local, alias, backend)
+    _local = local
@@ -0,0 +1,174 @@
+"""
+Reuse database connections across DATABASES overrides.
+
+Without help, Django keeps using the connections it opened for the
+real DATABASES setting while an override is enabled.  Connect the
+receiver to give each override connections that match its settings::
+
+    from override_settings.databases import update_connections
+    from override_settings.signals import setting_changed
+
+    setting_changed.connect(update_connections)
+
+Connections aren't closed when an override is enabled or disabled.
+The ones an override replaced, such as the test database connections,
+are put back when it's disabled.  Connections opened for an override's
+own settings are kept in ``pool``, keyed by the alias and its settings,
+and handed back out the next time the same settings are in effect, so
+an alternate configuration that many tests share is only connected to
+once.
+
+Django's connections belong to the thread that opened them, so only
+enable DATABASES overrides from the thread running the tests.
+"""
+import copy
+
+from django.db import connections
+
+from override_settings import _freeze, _real_settings
+from override_settings._lru import LRUCache
+
+def _close(connection):
+    connection.close()
+
+class ConnectionPool(object):
+    """
+    Idle connections keyed by alias and settings.
+
+    At most ``size`` idle connections are kept; the least recently
+    used one is closed to make room for another.
+    """
+    def __init__(self, size=8):
+        self._idle = LRUCache(size, on_evict=_close)
+
+    def _get_size(self):
+        return self._idle.size
+
+    def _set_size(self, size):
+        self._idle.size = size
+
+    size = property(_get_size, _set_size)
+
+    def key(self, alias, settings_dict):
+        return (alias, _freeze(settings_dict))
+
+    def acquire(self, alias, settings_dict):
+        """
+        Return an idle connection for ``alias`` with these settings and
+        remove it from the pool, or None if there isn't one.
+        """
+        return self._idle.pop(self.key(alias, settings_dict))
+
+    def release(self, connection):
+        """
+        Keep ``connection`` for reuse, closing the least recently used
+        idle connection if the pool is full.
+        """
+        key = self.key(connection.alias, connection.settings_dict)
+        idle = self._idle.pop(key)
+        if idle is not None and idle is not connection:
+            idle.close()
+        self._idle.put(key, connection)
+
+    def clear(self):
+        """
+        Close every idle connection.
+        """
+        self._idle.clear()
+
+    def __len__(self):
+        return len(self._idle)
+
+pool = ConnectionPool()
+
+# For every DATABASES value bound since the real one, innermost last:
+# the value and the connections it replaced.  They're kept out of the
+# pool so they can't be closed before they're put back.
+_stack = []
+
+def update_connections(sender, setting, value, enter=True, **kwargs):
+    """
+    setting_changed receiver that binds pooled connections matching the
+    new value of DATABASES, or puts back the connections an override
+    replaced when it's disabled.
+
+    Aliases without a connection are connected to lazily by Django, as
+    usual.
+    """
+    if setting != 'DATABASES':
+        return
+    real = getattr(_real_settings(), 'DATABASES', None)
+    level = None
+    if value is real:
+        level = 0
+    elif not enter:
+        for index, (bound, replaced) in enumerate(_stack):
+            if bound is value:
+                level = index + 1
+    current = _unbind_all()
+    if level is None:
+        _stack.append((value, current))
+        restored = {}
+    else:
+        restored = current
+        while len(_stack) > level:
+            for connection in restored.values():
+                pool.release(connection)
+            restored = _stack.pop()[1]
+    if value is not real:
+        # Django fills in defaults in place; keep them out of the
+        # override's value.
+        value = copy.deepcopy(value or {})
+    _set_databases(value)
+    for alias in connections.databases:
+        connection = restored.get(alias)
+        if connection is None:
+            connection = pool.acquire(alias, connections.databases[alias])
+        if connection is not None:
+            _bind(alias, connection)
+    for alias, connection in restored.items():
+        if alias not in connections.databases:
+            pool.release(connection)
+
+def _set_databases(value):
+    if hasattr(connections, 'configure_settings'):
+        # Django 3.2+
+        connections._settings = connections.settings = \
+            connections.configure_settings(value)
+    elif '_databases' in vars(connections):
+        # Django 1.8+ reads ``_databases`` the next time ``databases``
+        # is used.
+        connections._databases = value
+        vars(connections).pop('databases', None)
+    else:
+        connections.databases = value
+    for alias in connections.databases:
+        if hasattr(connections, 'ensure_defaults'):
+            connections.ensure_defaults(alias)
+        if hasattr(connections, 'prepare_test_settings'):
+            connections.prepare_test_settings(alias)
+
+# Django 1.2 and 1.3 keep connections in a dict; later versions in a
+# thread local.
+
+def _unbind_all():
+    bound = {}
+    for alias in list(connections.databases):
+        connection = _unbind(alias)
+        if connection is not None:
+            bound[alias] = connection
+    return bound
+
+def _unbind(alias):
+    if isinstance(connections._connections, dict):
+        return connections._connections.pop(alias, None)
+    connection = getattr(connections._connections, alias, None)
+    if connection is not None:
+        delattr(connections._connections, alias)
+    return connection
+
+def _bind(alias, connection):
+    if isinstance(connections._connections, dict):
+        connections._connections[alias] = connection
+    else:
+        setattr(connections._connections, alias, connection)
@@ -0,0 +1,97 @@
+"""
+Memoize values worked out from settings, and keep them right when the
+settings are overridden.
+
+Decorate a function with the names of the settings it reads::
+
+    from override_settings.memoize import cached_setting
+
+    @cached_setting('IGNORABLE_404_URLS')
+    def ignorable_404_pattern():
+        return re.compile('|'.join(settings.IGNORABLE_404_URLS))
+
+Results are cached until an override changes one of those settings.
+The cache is then set aside, keyed by the settings' old values, and
+comes back when the settings do, so disabling the override doesn't
+recompute anything.  Only the ``saved_size`` most recently set aside
+caches are kept.  Functions that don't depend on the settings that
+changed keep their caches.
+
+Overrides in the context scope aren't supported; the cache is shared
+by every thread.
+"""
+from functools import update_wrapper
+
+from django.conf import settings
+
+from override_settings import _freeze, _missing
+from override_settings._lru import LRUCache
+from override_settings.signals import setting_changed
+
+_kwargs_mark = object()
+
+class CachedSetting(object):
+    """
+    A function whose results are cached until one of the settings in
+    `names` changes.
+    """
+    # How many caches set aside for other values of the settings to keep.
+    saved_size = 16
+
+    def __init__(self, func, names):
+        self.func = func
+        self.names = frozenset(names)
+        self._cache = {}
+        self._token = None
+        self._saved = LRUCache(self.saved_size)
+        update_wrapper(self, func)
+        setting_changed.connect(self._setting_changed)
+
+    def __call__(self, *args, **kwargs):
+        key = args
+        if kwargs:
+            key += (_kwargs_mark,) + tuple(sorted(kwargs.items()))
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        if self._token is None:
+            # First call since the settings changed; pick up results
+            # set aside for these values earlier.
+            self._token = self._settings_token()
+            self._cache = self._saved.pop(self._token, {})
+            if key in self._cache:
+                return self._cache[key]
+        value = self._cache[key] = self.func(*args, **kwargs)
+        return value
+
+    def _settings_token(self):
+        return _freeze(tuple(getattr(settings, name, _missing)
+                             for name in sorted(self.names)))
+
+    def _setting_changed(self, sender, setting, **kwargs):
+        if setting not in self.names:
+            return
+        if self._cache:
+            self._saved.size = self.saved_size
+            self._saved.put(self._token, self._cache)
+        self._cache, self._token = {}, None
+
+    def cache_clear(self):
+        """
+        Throw away every cached result, including those set aside for
+        other values of the settings.
+        """
+        self._cache, self._token = {}, None
+        self._saved.clear()
+
+def cached_setting(*names):
+    """
+    Decorator that caches a function's results until an override
+    changes one of the settings in `names`.
+
+    Arguments are part of the cache key, so they must be hashable.
+    """
+    def decorator(func):
+        return CachedSetting(func, names)
+    return decorator
@@ -0,0 +1,87 @@
+"""
+Reuse loaded middleware across test clients and MIDDLEWARE_CLASSES
+overrides.
+
+Django's test client loads and instantiates every middleware for each
+new client, which Django's TestCase makes for every test.  Use
+CachedMiddlewareClient instead, and the middleware for each value of
+the setting is loaded once and kept in ``chains``::
+
+    from override_settings.middleware import CachedMiddlewareClient
+
+    class MyTests(TestCase):
+        client_class = CachedMiddlewareClient
+
+Middleware that reads other settings when it's instantiated would be
+reused with stale values, so name those settings in
+OVERRIDE_SETTINGS_MIDDLEWARE_KEYS and their values are kept apart
+too::
+
+    OVERRIDE_SETTINGS_MIDDLEWARE_KEYS = ('FEATURE_FLAGS',)
+
+Before each request the client checks those settings, so enabling or
+disabling an override switches to the middleware loaded for it,
+loading it only if it hasn't been seen before.
+
+Overrides in the context scope aren't supported; the cache is shared
+by every thread.
+"""
+from django.conf import settings
+from django.test.client import Client, ClientHandler
+
+from override_settings import _freeze
+from override_settings._lru import LRUCache
+
+# Everything BaseHandler.load_middleware sets up, across versions.
+MIDDLEWARE_ATTRS = (
+    '_request_middleware', '_view_middleware',
+    '_template_response_middleware', '_response_middleware',
+    '_exception_middleware', '_middleware_chain',
+)
+
+MIDDLEWARE_SETTINGS = ('MIDDLEWARE', 'MIDDLEWARE_CLASSES')
+
+# Loaded middleware keyed by middleware_key().
+chains = LRUCache(16)
+
+def middleware_key():
+    """
+    Return the middleware settings in effect, and the settings named in
+    OVERRIDE_SETTINGS_MIDDLEWARE_KEYS, as a hashable key.
+    """
+    names = MIDDLEWARE_SETTINGS + tuple(
+        getattr(settings, 'OVERRIDE_SETTINGS_MIDDLEWARE_KEYS', ()))
+    return tuple((name, _freeze(getattr(settings, name, None))) for name in names)
+
+class CachedMiddlewareHandler(ClientHandler):
+    """
+    ClientHandler that takes its middleware from ``chains``.
+    """
+    _middleware_key = None
+
+    def load_middleware(self):
+        key = middleware_key()
+        chain = chains.get(key)
+        if chain is None:
+            super(CachedMiddlewareHandler, self).load_middleware()
+            chain = dict((attr, getattr(self, attr)) for attr in MIDDLEWARE_ATTRS
+                         if hasattr(self, attr))
+            chains.put(key, chain)
+        else:
+            for attr, value in chain.items():
+                setattr(self, attr, value)
+        self._middleware_key = key
+
+    def __call__(self, *args, **kwargs):
+        if self._middleware_key is not None and self._middleware_key != middleware_key():
+            self.load_middleware()
+        return super(CachedMiddlewareHandler, self).__call__(*args, **kwargs)
+
+class CachedMiddlewareClient(Client):
+    """
+    Test client whose handler reuses loaded middleware.
+    """
+    def __init__(self, enforce_csrf_checks=False, **defaults):
+        super(CachedMiddlewareClient, self).__init__(
+            enforce_csrf_checks=enforce_csrf_checks, **defaults)
+        self.handler = CachedMiddlewareHandler(enforce_csrf_checks)
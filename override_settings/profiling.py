@@ -0,0 +1,326 @@
+"""
+Find out where a test suite spends its time on overrides.
+
+A Profiler records, for every override site (where an override_settings
+was created) and every test:
+
+- how many times overrides were enabled,
+- how long enabling and disabling them took,
+- which settings they overrode, and
+- how many times each of those settings was read while overridden.
+
+Sites are only known for overrides created while the profiler is
+installed; others are reported by their options.  Reads are only counted
+in the default global scope.  The report also lists overridden
+settings that were never read; those overrides can probably go.
+
+With ``track_reads`` the profiler also records every setting each test
+reads, overridden or not, and `write_index` saves which tests read
+which settings for override_settings.selection.
+
+To profile a Django test run, use ProfilingTestRunner.  The report is
+written to stderr when the run finishes, and also saved as JSON if the
+OVERRIDE_SETTINGS_PROFILE setting names a file::
+
+    TEST_RUNNER = 'override_settings.profiling.ProfilingTestRunner'
+    OVERRIDE_SETTINGS_PROFILE = 'override-profile.json'
+
+Setting OVERRIDE_SETTINGS_INDEX tracks reads and writes the index there.
+"""
+import json
+import sys
+import threading
+from timeit import default_timer
+
+from django.conf import settings
+from override_settings import (
+    LayeredSettings, SettingsDelta, get_profiler, set_profiler, push_layer,
+    pop_layer, _missing, _real_settings)
+from override_settings.runner import BaseRunner, unittest
+from override_settings.selection import fingerprint
+
+SORT_KEYS = ('total_time', 'enter_time', 'exit_time', 'entries', 'reads')
+
+class ReadCountingSettings(LayeredSettings):
+    """
+    LayeredSettings that tells the installed profiler about every
+    setting read.
+    """
+    __slots__ = ()
+
+    def __getattribute__(self, name):
+        if name.isupper():
+            profiler = get_profiler()
+            if profiler is not None:
+                profiler.read(name)
+        return object.__getattribute__(self, name)
+
+class Profiler(object):
+    settings_class = ReadCountingSettings
+
+    def __init__(self, track_reads=False):
+        self.sites = {}
+        self.tests = {}
+        self.current_test = None
+        self.track_reads = track_reads
+        # test -> names of every setting it read, with track_reads.
+        self.test_reads = {}
+        # (override, site) for every override enabled through the
+        # profiler, innermost last.
+        self._enabled = []
+        self._lock = threading.Lock()
+        self._base = None
+
+    def start(self):
+        set_profiler(self)
+        if self.track_reads:
+            # An empty layer keeps a ReadCountingSettings in front of
+            # the settings while no override is enabled.
+            self._base = SettingsDelta({})
+            push_layer(self._base)
+
+    def stop(self):
+        if self._base is not None:
+            pop_layer(self._base)
+            self._base = None
+        set_profiler(None)
+
+    def start_test(self, name):
+        self.current_test = name
+
+    def stop_test(self, name):
+        self.current_test = None
+
+    def _stats(self, site, keys):
+        stats = [self.sites.setdefault(site, _new_stats())]
+        if self.current_test is not None:
+            stats.append(self.tests.setdefault(self.current_test, _new_stats()))
+        for entry in stats:
+            entry['keys'].update(keys)
+        return stats
+
+    def enable(self, override):
+        site = override.site or repr(override.delta)
+        start = default_timer()
+        layered = push_layer(override.delta)
+        elapsed = default_timer() - start
+        for stats in self._stats(site, override.delta):
+            stats['entries'] += 1
+            stats['enter_time'] += elapsed
+        self._lock.acquire()
+        try:
+            self._enabled.append((override, site))
+        finally:
+            self._lock.release()
+        return layered
+
+    def disable(self, override):
+        start = default_timer()
+        pop_layer(override.delta)
+        elapsed = default_timer() - start
+        site = self._forget(override)
+        if site is None:
+            # Enabled before the profiler was started.
+            return
+        for stats in self._stats(site, override.delta):
+            stats['exit_time'] += elapsed
+
+    def _forget(self, override):
+        # Find the override's innermost entry; other threads may have
+        # enabled overrides since.
+        self._lock.acquire()
+        try:
+            for index in range(len(self._enabled) - 1, -1, -1):
+                if self._enabled[index][0] is override:
+                    return self._enabled.pop(index)[1]
+            return None
+        finally:
+            self._lock.release()
+
+    def read(self, key):
+        """
+        Count a read of `key` against the innermost override setting it.
+        """
+        if self.track_reads and self.current_test is not None:
+            self.test_reads.setdefault(self.current_test, set()).add(key)
+        for override, site in reversed(self._enabled):
+            if key in override.delta:
+                for stats in self._stats(site, ()):
+                    stats['reads'][key] = stats['reads'].get(key, 0) + 1
+                return
+
+    def unused(self):
+        """
+        Return a dict mapping each override site to the settings it
+        overrode that were never read while it was enabled.
+        """
+        unused = {}
+        for site, stats in self.sites.items():
+            keys = stats['keys'].difference(stats['reads'])
+            if keys:
+                unused[site] = sorted(keys)
+        return unused
+
+    def index(self):
+        """
+        Return which tests read which settings, with a fingerprint of
+        each setting's real value, for override_settings.selection.
+        """
+        readers = {}
+        for test, names in self.test_reads.items():
+            for name in names:
+                readers.setdefault(name, []).append(test)
+        real = _real_settings()
+        return {
+            'tests': sorted(self.test_reads),
+            'readers': dict((name, sorted(tests)) for name, tests in readers.items()),
+            'fingerprints': dict((name, fingerprint(getattr(real, name, _missing)))
+                                 for name in readers),
+        }
+
+    def write_index(self, path):
+        f = open(path, 'w')
+        try:
+            f.write(json.dumps(self.index(), indent=2, sort_keys=True))
+        finally:
+            f.close()
+
+    def as_dict(self, sort='total_time'):
+        """
+        Return the results as a dictionary of lists, each sorted by
+        `sort` (one of SORT_KEYS) with the largest first.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError("Can't sort by %r" % (sort,))
+        return {
+            'sites': _rows('site', self.sites, sort),
+            'tests': _rows('test', self.tests, sort),
+            'unused': [{'site': site, 'keys': keys}
+                       for site, keys in sorted(self.unused().items())],
+        }
+
+    def to_json(self, sort='total_time'):
+        return json.dumps(self.as_dict(sort), indent=2, sort_keys=True)
+
+    def dump(self, path, sort='total_time'):
+        f = open(path, 'w')
+        try:
+            f.write(self.to_json(sort))
+        finally:
+            f.close()
+
+    def report(self, sort='total_time', limit=20):
+        """
+        Return the results as text, showing the first `limit` rows of
+        each table.
+        """
+        results = self.as_dict(sort)
+        lines = []
+        for table, name in (('sites', 'site'), ('tests', 'test')):
+            lines.append('%-60s %8s %10s %10s %8s  %s' % (
+                name, 'entries', 'enter ms', 'exit ms', 'reads', 'settings'))
+            for row in results[table][:limit]:
+                lines.append('%-60s %8d %10.3f %10.3f %8d  %s' % (
+                    row[name][-60:], row['entries'], row['enter_time'] * 1000,
+                    row['exit_time'] * 1000, sum(row['reads'].values()),
+                    ', '.join(row['keys'])))
+            lines.append('')
+        if results['unused']:
+            lines.append('%-60s  %s' % ('overridden but never read', 'settings'))
+            for row in results['unused'][:limit]:
+                lines.append('%-60s  %s' % (row['site'][-60:], ', '.join(row['keys'])))
+            lines.append('')
+        return '\n'.join(lines)
+
+def _new_stats():
+    return {'entries': 0, 'enter_time': 0.0, 'exit_time': 0.0,
+            'keys': set(), 'reads': {}}
+
+def _rows(name, table, sort):
+    rows = []
+    for key, stats in table.items():
+        row = dict(stats)
+        row[name] = key
+        row['keys'] = sorted(stats['keys'])
+        row['reads'] = dict(stats['reads'])
+        row['total_time'] = stats['enter_time'] + stats['exit_time']
+        rows.append(row)
+    if sort == 'reads':
+        sort_key = lambda row: sum(row['reads'].values())
+    else:
+        sort_key = lambda row: row[sort]
+    rows.sort(key=sort_key, reverse=True)
+    return rows
+
+# Python 2.6's unittest, which runner falls back to on Django 1.2,
+# calls it _TextTestResult.
+TextTestResult = (getattr(unittest, 'TextTestResult', None) or
+                  unittest._TextTestResult)
+
+class ProfilingResultMixin(object):
+    """
+    Tells the installed profiler which test is running.
+    """
+    def startTest(self, test):
+        profiler = get_profiler()
+        if profiler is not None:
+            profiler.start_test(test.id())
+        super(ProfilingResultMixin, self).startTest(test)
+
+    def stopTest(self, test):
+        super(ProfilingResultMixin, self).stopTest(test)
+        profiler = get_profiler()
+        if profiler is not None:
+            profiler.stop_test(test.id())
+
+class ProfilingTestResult(ProfilingResultMixin, TextTestResult):
+    pass
+
+def profiling_result_class(base):
+    """
+    Return a subclass of the test result class `base` that tells the
+    installed profiler which test is running.
+    """
+    if issubclass(base, ProfilingResultMixin):
+        return base
+    if base is TextTestResult:
+        return ProfilingTestResult
+    return type('Profiling' + base.__name__, (ProfilingResultMixin, base), {})
+
+class ProfilingTestRunner(BaseRunner):
+    """
+    Django test runner that profiles overrides for the whole run.
+    """
+    def setup_test_environment(self, **kwargs):
+        super(ProfilingTestRunner, self).setup_test_environment(**kwargs)
+        # Install the profiler before the tests are imported, so the
+        # sites of decorators are known.
+        self.index_path = getattr(settings, 'OVERRIDE_SETTINGS_INDEX', None)
+        self.profiler = Profiler(track_reads=bool(self.index_path))
+        self.profiler.start()
+
+    def get_resultclass(self):
+        # Django 1.8 and later build their test runner with this.
+        resultclass = super(ProfilingTestRunner, self).get_resultclass()
+        if resultclass is None:
+            resultclass = getattr(self.test_runner, 'resultclass', TextTestResult)
+        return profiling_result_class(resultclass)
+
+    def run_suite(self, suite, **kwargs):
+        if hasattr(BaseRunner, 'get_resultclass'):
+            return super(ProfilingTestRunner, self).run_suite(suite, **kwargs)
+        # Earlier runners always use the default result class, so
+        # build the runner they would, with ours instead.
+        runner_class = getattr(self, 'test_runner', unittest.TextTestRunner)
+        return runner_class(verbosity=self.verbosity, failfast=self.failfast,
+                            resultclass=ProfilingTestResult).run(suite)
+
+    def teardown_test_environment(self, **kwargs):
+        self.profiler.stop()
+        sys.stderr.write('\n' + self.profiler.report())
+        path = getattr(settings, 'OVERRIDE_SETTINGS_PROFILE', None)
+        if path:
+            self.profiler.dump(path)
+        if self.index_path:
+            self.profiler.write_index(self.index_path)
+        super(ProfilingTestRunner, self).teardown_test_environment(**kwargs)
@@ -0,0 +1,194 @@
+"""
+pytest plugin for override_settings.
+
+Mark a module, class or test with the settings to override.  The
+override is enabled once for whatever was marked, and overrides for
+inner scopes are stacked on top::
+
+    pytestmark = pytest.mark.override_settings(FEATURE=True)
+
+    @pytest.mark.override_settings(CACHE_TIMEOUT=0)
+    class TestCache(object):
+        @pytest.mark.override_settings(DEBUG=True)
+        def test_debug(self):
+            ...
+
+The marker also takes override_settings objects, such as the ones
+with_apps and without_apps return.
+
+For other fixture scopes, including the whole session, make a fixture
+with settings_fixture in a conftest.py::
+
+    debug = settings_fixture(scope='session', autouse=True, DEBUG=True)
+
+The settings_override fixture enables an override for the rest of a
+test::
+
+    def test_timeout(settings_override):
+        settings_override(CACHE_TIMEOUT=0)
+
+With --group-by-settings, modules with the same overrides are run one
+after another, as are the classes and tests within a module.
+
+The plugin isn't loaded unless a project asks for it, since its
+fixtures run for every test.  Load it in the top-level conftest.py::
+
+    pytest_plugins = ['override_settings.pytest_plugin']
+
+or with ``-p override_settings.pytest_plugin`` on the command line or in
+addopts.  Markers need pytest 3.6 or later.
+"""
+import pytest
+
+from override_settings import override_settings, OVERRIDES_ATTR
+
+MARKER = 'override_settings'
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--group-by-settings', action='store_true', default=False,
+        help="run tests with the same override_settings next to each other")
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'override_settings(*overrides, **settings): enable an '
+        'override_settings for the marked module, class or test')
+
+def pytest_collection_modifyitems(session, config, items):
+    if config.getoption('group_by_settings'):
+        items[:] = group_items(items)
+
+def marked_overrides(node):
+    """
+    Return the overrides that markers put on `node` itself.
+    """
+    overrides = []
+    for mark in getattr(node, 'own_markers', ()):
+        if mark.name != MARKER:
+            continue
+        for override in mark.args:
+            if not isinstance(override, override_settings):
+                raise TypeError("The override_settings marker takes settings as "
+                                "keyword arguments or override_settings objects")
+            overrides.append(override)
+        if mark.kwargs:
+            overrides.append(override_settings(**mark.kwargs))
+    return overrides
+
+def _enable(overrides):
+    enabled = []
+    try:
+        for override in overrides:
+            override.enable()
+            enabled.append(override)
+    except:
+        _disable(enabled)
+        raise
+    return enabled
+
+def _disable(enabled):
+    for override in reversed(enabled):
+        override.disable()
+
+# pytest sets up fixtures with larger scopes first and tears them down
+# last, so these keep the overrides stacked in the right order.
+
+@pytest.fixture(scope='module', autouse=True)
+def _override_settings_module(request):
+    enabled = _enable(marked_overrides(request.node))
+    yield
+    _disable(enabled)
+
+@pytest.fixture(scope='class', autouse=True)
+def _override_settings_class(request):
+    # Tests outside a class get their own node here.
+    if isinstance(request.node, pytest.Class):
+        enabled = _enable(marked_overrides(request.node))
+    else:
+        enabled = []
+    yield
+    _disable(enabled)
+
+@pytest.fixture(autouse=True)
+def _override_settings_function(request):
+    enabled = _enable(marked_overrides(request.node))
+    yield
+    _disable(enabled)
+
+@pytest.fixture
+def settings_override():
+    """
+    Call with settings to override them for the rest of the test.
+    """
+    enabled = []
+
+    def enable(**kwargs):
+        override = override_settings(**kwargs)
+        enabled.extend(_enable([override]))
+        return override
+
+    yield enable
+    _disable(enabled)
+
+def settings_fixture(scope='function', autouse=False, name=None, **kwargs):
+    """
+    Return a fixture that enables an override_settings of `kwargs` for
+    `scope`.  Assign it to a name in a test module or conftest.py.
+    """
+    override = override_settings(**kwargs)
+
+    def fixture():
+        override.enable()
+        yield override
+        override.disable()
+    return pytest.fixture(scope=scope, autouse=autouse, name=name)(fixture)
+
+def settings_fingerprint(node):
+    """
+    Return the deltas applied to `node` by markers and decorators.
+    """
+    if node is None:
+        return ()
+    overrides = marked_overrides(node)
+    overrides.extend(getattr(getattr(node, 'obj', None), OVERRIDES_ATTR, ()))
+    return tuple(override.delta for override in overrides)
+
+def group_items(items):
+    """
+    Return `items` reordered so those with equal overrides are next to
+    each other, without splitting up modules or classes.
+    """
+    grouped = []
+    modules = _split(items, lambda item: item.getparent(pytest.Module))
+    for module, module_items in _grouped(modules, settings_fingerprint):
+        units = _split(module_items,
+                       lambda item: item.getparent(pytest.Class) or item)
+        for unit, unit_items in _grouped(units, settings_fingerprint):
+            if isinstance(unit, pytest.Class):
+                unit_items = [item for item, same in _grouped(
+                    [(item, [item]) for item in unit_items], settings_fingerprint)]
+            grouped.extend(unit_items)
+    return grouped
+
+def _split(items, key):
+    # [(node, items)] in order of each node's first item.
+    parts, order = {}, []
+    for item in items:
+        node = key(item)
+        if node not in parts:
+            parts[node] = []
+            order.append(node)
+        parts[node].append(item)
+    return [(node, parts[node]) for node in order]
+
+def _grouped(parts, fingerprint):
+    # Stable reorder of [(node, items)] putting equal fingerprints
+    # together, in order of each fingerprint's first appearance.
+    groups, order = {}, []
+    for node, node_items in parts:
+        key = fingerprint(node)
+        if key not in groups:
+            groups[key] = []
+            order.append(key)
+        groups[key].append((node, node_items))
+    return [part for key in order for part in groups[key]]
@@ -0,0 +1,419 @@
+"""
+Run tests that share class-level overrides back to back.
+
+`group_by_settings` reorders a suite so that test classes decorated
+with equal overrides run one after another, and enables those
+overrides once for the whole group.  The classes' own decorators leave
+them alone while the group runs.  A class's tearDownClass may only run
+once the next test starts, after its group's overrides are disabled.
+
+To use it with Django's test runner, point TEST_RUNNER at
+SettingsGroupingTestRunner::
+
+    TEST_RUNNER = 'override_settings.runner.SettingsGroupingTestRunner'
+
+ParallelSettingsTestRunner also splits the groups between forked
+worker processes, one per CPU unless the OVERRIDE_SETTINGS_WORKERS
+setting says otherwise, so each worker mostly runs tests with the same
+overrides.  Each worker runs against test databases of its own.
+"""
+import multiprocessing
+
+try:
+    # unittest2 on Python 2.6, which Django's test runner uses there.
+    from django.utils import unittest
+except ImportError:
+    import unittest
+
+from override_settings import (
+    OVERRIDES_ATTR, push_layer, pop_layer, _held_classes)
+
+try:
+    from django.test.runner import DiscoverRunner as BaseRunner
+except ImportError:
+    from django.test.simple import DjangoTestSuiteRunner as BaseRunner
+from django.conf import settings
+from django.db import connections
+from django.test import TestCase
+
+def iter_tests(suite):
+    """
+    Yield every test in `suite`, flattening nested suites.
+    """
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            for inner in iter_tests(test):
+                yield inner
+        else:
+            yield test
+
+def class_deltas(test):
+    """
+    Return the deltas applied to `test` by class decorators.
+    """
+    return tuple(override.delta
+                 for override in getattr(type(test), OVERRIDES_ATTR, ()))
+
+def method_deltas(test):
+    """
+    Return the deltas applied to `test` by method decorators.
+    """
+    method = getattr(type(test), getattr(test, '_testMethodName', ''), None)
+    return tuple(override.delta
+                 for override in getattr(method, OVERRIDES_ATTR, ()))
+
+def settings_fingerprint(test):
+    """
+    Return a hashable description of every override applied to `test`
+    by decorators, outermost first.
+    """
+    return class_deltas(test) + method_deltas(test)
+
+class SettingsGroup(unittest.TestSuite):
+    """
+    A suite of tests whose classes share `deltas`, which stay enabled
+    while the suite runs.
+    """
+    def __init__(self, deltas, tests=()):
+        super(SettingsGroup, self).__init__(tests)
+        self.deltas = deltas
+
+    def run(self, result, *args, **kwargs):
+        classes = set(type(test) for test in iter_tests(self)
+                      if class_deltas(test) == self.deltas)
+        for delta in self.deltas:
+            push_layer(delta)
+        _held_classes.update(classes)
+        try:
+            super(SettingsGroup, self).run(result, *args, **kwargs)
+        finally:
+            _held_classes.difference_update(classes)
+            for delta in reversed(self.deltas):
+                pop_layer(delta)
+        return result
+
+def group_by_settings(suite, classes=()):
+    """
+    Return a new suite with the tests from `suite` grouped by their
+    class-level overrides.
+
+    Tests of the same class stay together and in order, and groups
+    are ordered by their first test.  If `classes` is given, tests are
+    first split by which of those classes they are instances of, as
+    Django's test runner does, and grouped within each part.
+    """
+    bins = [[] for i in range(len(classes) + 1)]
+    for test in iter_tests(suite):
+        for i, cls in enumerate(classes):
+            if isinstance(test, cls):
+                bins[i].append(test)
+                break
+        else:
+            bins[-1].append(test)
+
+    grouped = unittest.TestSuite()
+    for tests in bins:
+        # deltas -> classes in order, class -> tests in order
+        groups, by_class, order = {}, {}, []
+        for test in tests:
+            cls = type(test)
+            if cls not in by_class:
+                by_class[cls] = []
+                deltas = class_deltas(test)
+                if deltas not in groups:
+                    groups[deltas] = []
+                    order.append(deltas)
+                groups[deltas].append(cls)
+            by_class[cls].append(test)
+        for deltas in order:
+            group_tests = []
+            for cls in groups[deltas]:
+                group_tests.extend(by_class[cls])
+            if deltas:
+                grouped.addTest(SettingsGroup(deltas, group_tests))
+            else:
+                grouped.addTests(group_tests)
+    return grouped
+
+class SettingsGroupingTestRunner(BaseRunner):
+    """
+    Django test runner that groups tests with group_by_settings.
+    """
+    def build_suite(self, *args, **kwargs):
+        suite = super(SettingsGroupingTestRunner, self).build_suite(*args, **kwargs)
+        return group_by_settings(suite, getattr(self, 'reorder_by', (TestCase,)))
+
+def shard_by_settings(suite, count):
+    """
+    Split a suite built by group_by_settings into at most `count`
+    suites with about the same number of tests.
+
+    Settings groups are kept whole where possible.  A group with more
+    than an even share of the tests is split between its classes, and
+    each part still runs with the group's overrides.  Every shard
+    keeps the order of the original suite.
+    """
+    # (position, deltas, tests) for each piece of the suite.
+    units = []
+    for item in suite:
+        if isinstance(item, SettingsGroup):
+            deltas, tests = item.deltas, list(item)
+        else:
+            deltas, tests = (), [item]
+        if units and not deltas and not units[-1][1]:
+            units[-1][2].extend(tests)
+        else:
+            units.append((len(units), deltas, tests))
+
+    total = sum(len(tests) for position, deltas, tests in units)
+    share = max(1, -(-total // count))
+    pieces = []
+    for position, deltas, tests in units:
+        if len(tests) <= share:
+            pieces.append((position, deltas, tests))
+            continue
+        for cls_tests in _split_by_class(tests):
+            pieces.append((position, deltas, cls_tests))
+
+    # Biggest pieces first, each onto the shard with the fewest tests.
+    shards = [[] for i in range(count)]
+    sizes = [0] * count
+    for piece in sorted(pieces, key=lambda piece: -len(piece[2])):
+        index = sizes.index(min(sizes))
+        shards[index].append(piece)
+        sizes[index] += len(piece[2])
+
+    suites = []
+    for pieces in shards:
+        if not pieces:
+            continue
+        shard = unittest.TestSuite()
+        for position, deltas, tests in sorted(pieces, key=lambda piece: piece[0]):
+            if deltas:
+                shard.addTest(SettingsGroup(deltas, tests))
+            else:
+                shard.addTests(tests)
+        suites.append(shard)
+    return suites
+
+def _split_by_class(tests):
+    parts = []
+    for test in tests:
+        if parts and type(parts[-1][-1]) is type(test):
+            parts[-1].append(test)
+        else:
+            parts.append([test])
+    return parts
+
+class WorkerError(Exception):
+    """
+    An error or failure reported by a worker process.  Its message is
+    the traceback the worker formatted.
+    """
+
+class _WorkerTest(object):
+    # Stands in for things that aren't tests of the shard, like a
+    # failed setUpClass or a subtest.
+    def __init__(self, description):
+        self.description = description
+
+    def id(self):
+        return self.description
+
+    def shortDescription(self):
+        return None
+
+    def __str__(self):
+        return self.description
+
+class _RecordingResult(unittest.TestResult):
+    """
+    Records what happens to each test as picklable events so a worker
+    can send them back to the parent.
+    """
+    def __init__(self, tests):
+        super(_RecordingResult, self).__init__()
+        self.index = dict((id(test), i) for i, test in enumerate(tests))
+        self.events = []
+
+    def _record(self, name, test, *args):
+        self.events.append((name, self.index.get(id(test), str(test))) + args)
+
+    def startTest(self, test):
+        self._record('startTest', test)
+
+    def stopTest(self, test):
+        self._record('stopTest', test)
+
+    def addSuccess(self, test):
+        self._record('addSuccess', test)
+
+    def addError(self, test, err):
+        self._record('addError', test, self._exc_info_to_string(err, test))
+
+    def addFailure(self, test, err):
+        self._record('addFailure', test, self._exc_info_to_string(err, test))
+
+    def addSkip(self, test, reason):
+        self._record('addSkip', test, reason)
+
+    def addExpectedFailure(self, test, err):
+        self._record('addExpectedFailure', test, self._exc_info_to_string(err, test))
+
+    def addUnexpectedSuccess(self, test):
+        self._record('addUnexpectedSuccess', test)
+
+    def addSubTest(self, test, subtest, err):
+        if err is not None:
+            if issubclass(err[0], test.failureException):
+                name = 'addFailure'
+            else:
+                name = 'addError'
+            self.events.append((name, str(subtest), self._exc_info_to_string(err, test)))
+
+def _replay(events, tests, result):
+    for event in events:
+        name, test, args = event[0], event[1], event[2:]
+        if isinstance(test, int):
+            test = tests[test]
+        else:
+            test = _WorkerTest(test)
+        if name in ('addError', 'addFailure', 'addExpectedFailure'):
+            args = ((WorkerError, WorkerError(args[0]), None),)
+        getattr(result, name)(test, *args)
+
+# The shards of the ParallelSuite being run, inherited by its workers.
+_shards = None
+
+def _in_memory(connection):
+    name = connection.settings_dict['NAME'] or ''
+    return connection.vendor == 'sqlite' and (name == ':memory:' or 'mode=memory' in name)
+
+def _mirror_of(connection):
+    settings_dict = connection.settings_dict
+    return (settings_dict.get('TEST_MIRROR') or
+            (settings_dict.get('TEST') or {}).get('MIRROR'))
+
+def _worker_aliases():
+    # Aliases whose test database each worker needs a copy of.  Each
+    # worker's copy of an in-memory sqlite database is already its own.
+    aliases = []
+    for alias in connections:
+        connection = connections[alias]
+        if (connection.settings_dict['ENGINE'].endswith('.dummy') or
+                _in_memory(connection) or _mirror_of(connection)):
+            continue
+        aliases.append(alias)
+    return aliases
+
+def create_worker_databases(count):
+    """
+    Create `count` more test databases for each alias with a test
+    database, the way the test runner created the first.
+
+    Return a dict mapping each alias to the names of its new databases.
+    """
+    names = {}
+    for alias in _worker_aliases():
+        connection = connections[alias]
+        settings_dict = connection.settings_dict
+        # create_test_db() changes these, and DATABASES too from 1.7.
+        saved = dict((key, settings_dict[key]) for key in ('NAME', 'TEST_NAME', 'TEST')
+                     if key in settings_dict)
+        saved_setting = settings.DATABASES[alias].get('NAME')
+        names[alias] = []
+        try:
+            for worker in range(count):
+                # The test database's name from Django 1.7, TEST_NAME before.
+                name = '%s_%d' % (saved['NAME'], worker + 1)
+                settings_dict['TEST_NAME'] = name
+                settings_dict['TEST'] = dict(saved.get('TEST') or {}, NAME=name)
+                connection.creation.create_test_db(0, True)
+                names[alias].append(name)
+        finally:
+            connection.close()
+            for key in ('TEST_NAME', 'TEST'):
+                settings_dict.pop(key, None)
+            settings_dict.update(saved)
+            settings.DATABASES[alias]['NAME'] = saved_setting
+    return names
+
+def destroy_worker_databases(names):
+    for alias, alias_names in names.items():
+        for name in alias_names:
+            connections[alias].creation._destroy_test_db(name, 0)
+
+def _init_worker(counter, names):
+    # Connections inherited from the parent can't be shared with it;
+    # drop them without closing them, and point each alias at this
+    # worker's own test database.  In-memory sqlite databases only
+    # exist inside their connection, so those are kept.
+    counter.acquire()
+    try:
+        counter.value += 1
+        worker = counter.value - 1
+    finally:
+        counter.release()
+    for connection in connections.all():
+        if _in_memory(connection):
+            continue
+        connection.connection = None
+        alias = _mirror_of(connection) or connection.alias
+        if names.get(alias):
+            connection.settings_dict['NAME'] = names[alias][worker % len(names[alias])]
+
+def _run_shard(index):
+    tests = list(iter_tests(_shards[index]))
+    result = _RecordingResult(tests)
+    _shards[index].run(result)
+    return index, result.events
+
+class ParallelSuite(unittest.TestSuite):
+    """
+    A suite that runs each of `shards` in a forked worker process and
+    reports their results to the parent's result as they finish.
+
+    Each worker gets test databases of its own, created before the
+    workers are forked and destroyed once they're done.
+    """
+    def __init__(self, shards, processes=None):
+        super(ParallelSuite, self).__init__(shards)
+        self.shards = list(shards)
+        self.processes = processes or len(self.shards)
+
+    def run(self, result, *args, **kwargs):
+        global _shards
+        _shards = self.shards
+        names = create_worker_databases(self.processes)
+        try:
+            pool = _fork_pool(self.processes, (multiprocessing.Value('i', 0), names))
+            try:
+                for index, events in pool.imap_unordered(_run_shard, range(len(self.shards))):
+                    _replay(events, list(iter_tests(self.shards[index])), result)
+            finally:
+                pool.terminate()
+                pool.join()
+        finally:
+            _shards = None
+            destroy_worker_databases(names)
+        return result
+
+def _fork_pool(processes, initargs):
+    if hasattr(multiprocessing, 'get_context'):
+        return multiprocessing.get_context('fork').Pool(processes, _init_worker, initargs)
+    return multiprocessing.Pool(processes, _init_worker, initargs)
+
+class ParallelSettingsTestRunner(SettingsGroupingTestRunner):
+    """
+    Django test runner that groups tests with group_by_settings and
+    runs the groups in parallel worker processes.
+    """
+    def workers(self):
+        return (getattr(settings, 'OVERRIDE_SETTINGS_WORKERS', None)
+                or multiprocessing.cpu_count())
+
+    def run_suite(self, suite, **kwargs):
+        workers = self.workers()
+        if workers > 1:
+            suite = ParallelSuite(shard_by_settings(suite, workers))
+        return super(ParallelSettingsTestRunner, self).run_suite(suite, **kwargs)
@@ -0,0 +1,103 @@
+"""
+Run only the tests that read settings that have changed.
+
+A profiled run with read tracking (see override_settings.profiling)
+can write an index of which tests read which settings, along with a
+fingerprint of each setting's value.  SelectiveTestRunner compares the
+current settings with those fingerprints and runs only the tests that
+read a setting that changed, plus any tests the index doesn't know::
+
+    TEST_RUNNER = 'override_settings.selection.SelectiveTestRunner'
+    OVERRIDE_SETTINGS_INDEX = 'settings-index.json'
+
+Without an index every test is run.  Reads the code under test makes
+outside of a test, such as at import time, aren't in the index, so
+rerun the whole suite now and then.
+"""
+import hashlib
+import json
+import os
+import sys
+
+from django.conf import settings
+
+from override_settings import _missing, _real_settings
+from override_settings.runner import BaseRunner, iter_tests, unittest
+
+def fingerprint(value):
+    """
+    Return a short string that changes when `value` does.
+
+    Objects whose repr() includes their address get a new fingerprint in
+    every process, so tests reading them are always selected.
+    """
+    if value is _missing:
+        return None
+    return hashlib.md5(_stable_repr(value).encode('utf-8')).hexdigest()[:16]
+
+def _stable_repr(value):
+    # The order of a set's repr() depends on string hashing, which is
+    # randomized in each process on Python 3, so sets and dicts are
+    # written out sorted.
+    if isinstance(value, dict):
+        return '{%s}' % ', '.join(sorted('%s: %s' % (_stable_repr(key), _stable_repr(v))
+                                         for key, v in value.items()))
+    if isinstance(value, list):
+        return '[%s]' % ', '.join(map(_stable_repr, value))
+    if isinstance(value, tuple):
+        return '(%s,)' % ', '.join(map(_stable_repr, value))
+    if isinstance(value, (set, frozenset)):
+        return 'set([%s])' % ', '.join(sorted(map(_stable_repr, value)))
+    return repr(value)
+
+def load_index(path):
+    f = open(path)
+    try:
+        return json.load(f)
+    finally:
+        f.close()
+
+def changed_settings(index, current=None):
+    """
+    Return the names of settings in `index` whose fingerprint doesn't
+    match their value in `current`, the real settings by default.
+    """
+    if current is None:
+        current = _real_settings()
+    changed = []
+    for name, stored in index['fingerprints'].items():
+        if fingerprint(getattr(current, name, _missing)) != stored:
+            changed.append(name)
+    return sorted(changed)
+
+def select_tests(index, changed):
+    """
+    Return the ids of the tests in `index` that read any of the
+    settings named in `changed`.
+    """
+    selected = set()
+    for name in changed:
+        selected.update(index['readers'].get(name, ()))
+    return selected
+
+class SelectiveTestRunner(BaseRunner):
+    """
+    Django test runner that skips tests that only read settings that
+    haven't changed since the OVERRIDE_SETTINGS_INDEX index was written.
+    """
+    def build_suite(self, *args, **kwargs):
+        suite = super(SelectiveTestRunner, self).build_suite(*args, **kwargs)
+        path = getattr(settings, 'OVERRIDE_SETTINGS_INDEX', None)
+        if not path or not os.path.exists(path):
+            return suite
+        index = load_index(path)
+        changed = changed_settings(index)
+        selected = select_tests(index, changed)
+        known = set(index['tests'])
+        tests = list(iter_tests(suite))
+        kept = [test for test in tests
+                if test.id() in selected or test.id() not in known]
+        if self.verbosity >= 1:
+            sys.stderr.write('Running %d of %d tests; changed settings: %s\n' % (
+                len(kept), len(tests), ', '.join(changed) or 'none'))
+        return unittest.TestSuite(kept)
@@ -0,0 +1,8 @@
+from django.dispatch import Signal
+
+try:
+    # Django 1.4 and later have their own, and we want its receivers
+    # to hear about our overrides too.
+    from django.test.signals import setting_changed
+except ImportError:
+    setting_changed = Signal(providing_args=["setting", "value", "enter"])
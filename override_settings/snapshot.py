@@ -0,0 +1,129 @@
+"""
+Capture the effective settings and restore them somewhere else.
+
+A snapshot records the settings in effect, including every enabled
+override, as their differences from Django's global defaults.  That
+keeps it small, and lets it be compared, hashed and pickled.  Restoring
+a snapshot enables a single override that makes the settings match it
+exactly, so a worker or subprocess can start from the same settings
+without running the decorators again::
+
+    from override_settings.snapshot import capture
+
+    data = pickle.dumps(capture())
+
+    # in the other process
+    with pickle.loads(data).restore():
+        ...
+"""
+from django.conf import settings
+
+from override_settings import (
+    override_settings, get_global_settings, _differs, _freeze, _missing,
+    _real_settings, SETTING_DELETED)
+
+def _effective_settings():
+    _real_settings()  # make sure settings are configured
+    wrapped = settings._wrapped
+    values = {}
+    for name in dir(wrapped):
+        if name.isupper():
+            values[name] = getattr(wrapped, name)
+    return values
+
+class SettingsSnapshot(object):
+    """
+    The effective settings at one point in time.
+
+    `values` holds the settings that are missing from or differ from
+    Django's global defaults, and `deleted` the names of defaults that
+    weren't defined.
+    """
+    __slots__ = ('values', 'deleted', '_frozen')
+
+    def __init__(self, values, deleted=()):
+        self.values = dict(values)
+        self.deleted = frozenset(deleted)
+        self._frozen = None
+
+    def __reduce__(self):
+        return (SettingsSnapshot, (self.values, self.deleted))
+
+    def get(self, name, default=None):
+        """
+        Return the value `name` had, or `default` if it wasn't defined.
+        """
+        if name in self.values:
+            return self.values[name]
+        if name in self.deleted:
+            return default
+        return get_global_settings().get(name, default)
+
+    def diff(self, other):
+        """
+        Return a dict mapping each setting that differs between this
+        snapshot and `other` to its pair of values.  SETTING_DELETED
+        stands in for settings that weren't defined.
+        """
+        if self == other:
+            return {}
+        changed = {}
+        names = (set(self.values) | set(other.values) |
+                 self.deleted | other.deleted)
+        for name in names:
+            mine = self.get(name, SETTING_DELETED)
+            theirs = other.get(name, SETTING_DELETED)
+            if _differs(mine, theirs):
+                changed[name] = (mine, theirs)
+        return changed
+
+    def restore(self):
+        """
+        Return an override_settings that makes the current settings
+        match this snapshot.
+
+        The override is worked out against the settings in effect when
+        restore() is called.
+        """
+        current = _effective_settings()
+        options = {}
+        for name in set(current) | set(self.values) | self.deleted:
+            value = self.get(name, SETTING_DELETED)
+            if _differs(current.get(name, SETTING_DELETED), value):
+                options[name] = value
+        return override_settings(**options)
+
+    def frozen(self):
+        if self._frozen is None:
+            self._frozen = (_freeze(self.values), self.deleted)
+        return self._frozen
+
+    def __hash__(self):
+        return hash(self.frozen())
+
+    def __eq__(self, other):
+        if not isinstance(other, SettingsSnapshot):
+            return NotImplemented
+        return self.frozen() == other.frozen()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __repr__(self):
+        return '<SettingsSnapshot %r>' % (sorted(self.values),)
+
+def capture():
+    """
+    Return a SettingsSnapshot of the settings in effect right now.
+    """
+    defaults = get_global_settings()
+    current = _effective_settings()
+    values = {}
+    for name, value in current.items():
+        if _differs(defaults.get(name, _missing), value):
+            values[name] = value
+    deleted = [name for name in defaults if name not in current]
+    return SettingsSnapshot(values, deleted)
@@ -6,10 +6,23 @@ if not settings.configured:
     # We use 'django.contrib.sites' for the without_apps context manager test.
     settings.configure(INSTALLED_APPS=['django.contrib.sites'])
 
+import operator
+import threading
 import unittest
 from override_settings import (
     override_settings, SETTING_DELETED,
-    with_apps, without_apps)
+    with_apps, without_apps,
+    get_global_settings, clear_global_settings_cache,
+    LayeredSettings, override_class_settings, SettingsDelta,
+    set_scope, GLOBAL_SCOPE, CONTEXT_SCOPE,
+    NestedChange, override_nested, SequenceChange)
+from override_settings.signals import setting_changed
+
+try:
+    from django.test.utils import override_settings as django_override_settings
+except ImportError:
+    # Django 1.3 and earlier
+    django_override_settings = None
 
 @override_settings(FOO="abc")
 class TestOverrideSettingsDecoratedClass(unittest.TestCase):
@@ -99,6 +112,30 @@ class TestAppModifiers(unittest.TestCase):
             self.assertFalse('django.contrib.sites' in settings.INSTALLED_APPS)
         self.assertTrue('django.contrib.sites' in settings.INSTALLED_APPS)
 
+    def test_apps_keep_their_order(self):
+        with with_apps('django.contrib.auth', 'django.contrib.contenttypes',
+                       'django.contrib.sites'):
+            self.assertEqual(settings.INSTALLED_APPS, [
+                'django.contrib.sites',
+                'django.contrib.auth',
+                'django.contrib.contenttypes',
+            ])
+
+    def test_apps_worked_out_when_enabled(self):
+        """
+        The apps are added to INSTALLED_APPS as it is when enabled, not
+        as it was when the decorator was created.
+        """
+        add_auth = with_apps('django.contrib.auth')
+        remove_sites = without_apps('django.contrib.sites')
+        with override_settings(INSTALLED_APPS=('django.contrib.sites', 'x')):
+            with add_auth:
+                self.assertEqual(settings.INSTALLED_APPS,
+                                 ('django.contrib.sites', 'x', 'django.contrib.auth'))
+                with remove_sites:
+                    self.assertEqual(settings.INSTALLED_APPS,
+                                     ('x', 'django.contrib.auth'))
+
 @override_settings(DUMMY_OPTION=42)
 class TestSettingDeleted(unittest.TestCase):
     def test_dummy_option_exists(self):
@@ -180,11 +217,11 @@ class TestGlobalSettingsUnaffected(unittest.TestCase):
         Ensure global settings aren't touched.
 
         We don't want the passed options to be the *only* settings
-        set.  We check here for USE_ETAGS, defined in
+        set.  We check here for TIME_ZONE, defined in
         django.conf.global_settings and untouched by override_settings.
         """
         self.assertEqual(settings.DUMMY_OPTION, 42)
-        self.assertTrue('USE_ETAGS' in dir(settings))
+        self.assertTrue('TIME_ZONE' in dir(settings))
 
 class TestMultipleSettingsAtOnce(unittest.TestCase):
     @override_settings(OPTION_A=True)
@@ -194,3 +231,562 @@ class TestMultipleSettingsAtOnce(unittest.TestCase):
             self.assertEqual(settings.OPTION_A, False)
             self.assertEqual(settings.OPTION_B, "abc")
         self.assertEqual(settings.OPTION_A, True)
+
+class TestGlobalSettingsCache(unittest.TestCase):
+    def test_snapshot_is_shared(self):
+        """
+        The global_settings snapshot is only built once.
+        """
+        self.assertTrue(get_global_settings() is get_global_settings())
+        self.assertTrue('TIME_ZONE' in get_global_settings())
+
+    def test_clear_cache(self):
+        """
+        Clearing the cache rebuilds the snapshot on next use.
+        """
+        before = get_global_settings()
+        clear_global_settings_cache()
+        after = get_global_settings()
+        self.assertFalse(before is after)
+        self.assertEqual(before, after)
+
+    def test_construction_does_not_copy_defaults(self):
+        """
+        Constructing an override only keeps the passed options around.
+        """
+        self.assertEqual(override_settings(FOO="abc").overrides, {'FOO': "abc"})
+
+class TestLayeredSettings(unittest.TestCase):
+    def test_real_settings_restored(self):
+        """
+        The real settings are put back once the last override is disabled.
+        """
+        real = settings._wrapped
+        with override_settings(FOO="abc"):
+            self.assertTrue(isinstance(settings._wrapped, LayeredSettings))
+            with override_settings(BAR="xyz"):
+                self.assertTrue(isinstance(settings._wrapped, LayeredSettings))
+            self.assertTrue(isinstance(settings._wrapped, LayeredSettings))
+        self.assertTrue(settings._wrapped is real)
+
+    def test_configured_settings_visible(self):
+        """
+        Settings that aren't overridden come from the configured settings.
+        """
+        with override_settings(FOO="abc"):
+            self.assertEqual(settings.INSTALLED_APPS, ['django.contrib.sites'])
+
+    def test_assignment_is_discarded(self):
+        """
+        Settings assigned while an override is enabled don't leak out.
+        """
+        with override_settings(FOO="abc"):
+            settings.FOO = "changed"
+            settings.BAR = "new"
+            self.assertEqual(settings.FOO, "changed")
+            self.assertEqual(settings.BAR, "new")
+        self.assertRaises(AttributeError, getattr, settings, "FOO")
+        self.assertRaises(AttributeError, getattr, settings, "BAR")
+
+    def test_reenable_does_not_share_assignments(self):
+        """
+        Each time an override is enabled it starts from its own options.
+        """
+        override = override_settings(FOO="abc")
+        with override:
+            settings.FOO = "changed"
+        with override:
+            self.assertEqual(settings.FOO, "abc")
+
+    def test_nested_layers_unwind(self):
+        """
+        Each level sees the flattened result of every layer beneath it.
+        """
+        with override_settings(FOO=1, BAR=1):
+            with override_settings(FOO=2, BAR=SETTING_DELETED):
+                with override_settings(BAR=3):
+                    self.assertEqual((settings.FOO, settings.BAR), (2, 3))
+                self.assertEqual(settings.FOO, 2)
+                self.assertRaises(AttributeError, getattr, settings, "BAR")
+            self.assertEqual((settings.FOO, settings.BAR), (1, 1))
+
+    def test_read_through_not_kept_after_push(self):
+        """
+        Values read from the real settings don't hide later overrides.
+        """
+        with override_settings(FOO="abc"):
+            self.assertEqual(settings.INSTALLED_APPS, ['django.contrib.sites'])
+            with override_settings(INSTALLED_APPS=['django.contrib.auth']):
+                self.assertEqual(settings.INSTALLED_APPS, ['django.contrib.auth'])
+            self.assertEqual(settings.INSTALLED_APPS, ['django.contrib.sites'])
+
+if django_override_settings is not None:
+    class TestDjangoOverrideSettings(unittest.TestCase):
+        def test_nested_between_ours(self):
+            """
+            Django's override_settings isn't lost under one of ours.
+            """
+            with override_settings(FOO=1):
+                with django_override_settings(BAR=2):
+                    with override_settings(BAZ=3):
+                        self.assertEqual((settings.FOO, settings.BAR, settings.BAZ),
+                                         (1, 2, 3))
+                    self.assertEqual((settings.FOO, settings.BAR), (1, 2))
+                    self.assertFalse(hasattr(settings, "BAZ"))
+                self.assertEqual(settings.FOO, 1)
+                self.assertFalse(hasattr(settings, "BAR"))
+            self.assertFalse(hasattr(settings, "FOO"))
+
+        def test_ours_under_django(self):
+            real = settings._wrapped
+            with django_override_settings(BAR=2):
+                wrapped = settings._wrapped
+                with override_settings(FOO=1):
+                    self.assertEqual((settings.FOO, settings.BAR), (1, 2))
+                self.assertTrue(settings._wrapped is wrapped)
+            self.assertTrue(settings._wrapped is real)
+
+class TestUnknownSettings(unittest.TestCase):
+    """
+    Names that were never set raise AttributeError under an override.
+    """
+    @override_settings(FOO="abc")
+    def test_unknown_setting_raises(self):
+        self.assertRaises(AttributeError, getattr, settings, "NOT_A_SETTING")
+
+    @override_settings(FOO="abc")
+    def test_getattr_default(self):
+        """
+        Code using getattr() with a default takes the default branch.
+        """
+        self.assertEqual(getattr(settings, "NOT_A_SETTING", "default"), "default")
+        self.assertFalse(hasattr(settings, "NOT_A_SETTING"))
+
+    @override_settings(FOO="abc")
+    def test_unknown_setting_not_stored(self):
+        """
+        A failed lookup doesn't leave anything behind.
+        """
+        getattr(settings, "NOT_A_SETTING", None)
+        self.assertFalse("NOT_A_SETTING" in settings._wrapped.__dict__)
+        self.assertFalse("NOT_A_SETTING" in dir(settings))
+
+class TestOverrideClassSettingsFallback(unittest.TestCase):
+    def test_per_test_without_set_up_class(self):
+        """
+        Classes that can't have setUpClass get the override per test.
+        """
+        @override_class_settings(FOO="abc")
+        class Case(object):
+            def setUp(self):
+                pass
+            def tearDown(self):
+                pass
+
+        case = Case()
+        case.setUp()
+        try:
+            self.assertEqual(settings.FOO, "abc")
+        finally:
+            case.tearDown()
+        self.assertRaises(AttributeError, getattr, settings, "FOO")
+
+# Python 2.6's unittest doesn't run setUpClass.
+if hasattr(unittest.TestCase, 'setUpClass'):
+    class TestOverrideClassSettings(unittest.TestCase):
+        def run_case(self, case):
+            result = unittest.TestResult()
+            unittest.TestLoader().loadTestsFromTestCase(case).run(result)
+            return result
+
+        def test_enabled_once_per_class(self):
+            """
+            The override is enabled once for all of the class's tests.
+            """
+            calls = []
+            class counting_override(override_class_settings):
+                def enable(self):
+                    calls.append('enable')
+                    return super(counting_override, self).enable()
+                def disable(self):
+                    calls.append('disable')
+                    super(counting_override, self).disable()
+
+            @counting_override(FOO="abc")
+            class Case(unittest.TestCase):
+                def test_one(self):
+                    self.assertEqual(settings.FOO, "abc")
+                def test_two(self):
+                    self.assertEqual(settings.FOO, "abc")
+
+            result = self.run_case(Case)
+            self.assertEqual(result.testsRun, 2)
+            self.assertTrue(result.wasSuccessful())
+            self.assertEqual(calls, ['enable', 'disable'])
+            self.assertRaises(AttributeError, getattr, settings, "FOO")
+
+        def test_method_overrides_stack(self):
+            """
+            Method decorators and context managers stack on the class override.
+            """
+            @override_class_settings(FOO="abc", BAR=1)
+            class Case(unittest.TestCase):
+                @override_settings(FOO="xyz")
+                def test_method(self):
+                    self.assertEqual((settings.FOO, settings.BAR), ("xyz", 1))
+                def test_context_manager(self):
+                    with override_settings(BAR=SETTING_DELETED):
+                        self.assertRaises(AttributeError, getattr, settings, "BAR")
+                    self.assertEqual((settings.FOO, settings.BAR), ("abc", 1))
+
+            result = self.run_case(Case)
+            self.assertEqual(result.testsRun, 2)
+            self.assertTrue(result.wasSuccessful())
+            self.assertEqual(Case.__name__, 'Case')
+
+        def test_disabled_when_set_up_class_fails(self):
+            """
+            A failing setUpClass doesn't leave the override enabled.
+            """
+            @override_class_settings(FOO="abc")
+            class Case(unittest.TestCase):
+                @classmethod
+                def setUpClass(cls):
+                    raise ValueError
+                def test_nothing(self):
+                    pass
+
+            result = self.run_case(Case)
+            self.assertEqual(len(result.errors), 1)
+            self.assertRaises(AttributeError, getattr, settings, "FOO")
+
+class TestSettingsDelta(unittest.TestCase):
+    def test_hashable(self):
+        """
+        Deltas with the same options are equal, even with unhashable values.
+        """
+        a = SettingsDelta({'FOO': [1, {'b': 2}], 'BAR': "abc"})
+        b = SettingsDelta({'BAR': "abc", 'FOO': [1, {'b': 2}]})
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertNotEqual(a, SettingsDelta({'FOO': (1, {'b': 2}), 'BAR': "abc"}))
+        self.assertEqual(len(set([a, b])), 1)
+
+    def test_built_on_first_use(self):
+        """
+        Decorating doesn't build the delta; enabling does, once.
+        """
+        override = override_settings(FOO="abc")
+        override(lambda: None)
+        self.assertFalse('_delta' in override.__dict__)
+        with override:
+            delta = override.delta
+        self.assertTrue(override.delta is delta)
+
+    def test_immutable(self):
+        delta = override_settings(FOO="abc").delta
+        self.assertRaises(AttributeError, setattr, delta, 'FOO', 1)
+        self.assertRaises(TypeError, operator.setitem, delta, 'FOO', 1)
+
+    def test_reentrant(self):
+        """
+        The same override can be enabled inside itself.
+        """
+        override = override_settings(FOO="abc")
+        with override:
+            with override_settings(FOO="xyz"):
+                with override:
+                    self.assertEqual(settings.FOO, "abc")
+                    settings.FOO = "changed"
+                self.assertEqual(settings.FOO, "xyz")
+            self.assertEqual(settings.FOO, "abc")
+        self.assertRaises(AttributeError, getattr, settings, "FOO")
+
+    def test_disable_out_of_order(self):
+        """
+        Disabling anything but the innermost override is an error.
+        """
+        outer = override_settings(FOO="abc")
+        inner = override_settings(FOO="xyz")
+        outer.enable()
+        inner.enable()
+        try:
+            self.assertRaises(RuntimeError, outer.disable)
+        finally:
+            inner.disable()
+            outer.disable()
+
+class TestContextScope(unittest.TestCase):
+    def setUp(self):
+        set_scope(CONTEXT_SCOPE)
+
+    def tearDown(self):
+        set_scope(GLOBAL_SCOPE)
+
+    def run_in_thread(self, func):
+        results = []
+        thread = threading.Thread(target=lambda: results.append(func()))
+        thread.start()
+        thread.join()
+        return results[0]
+
+    def test_other_threads_unaffected(self):
+        """
+        Overrides enabled in one thread aren't seen by another.
+        """
+        with override_settings(FOO="main"):
+            self.assertEqual(
+                self.run_in_thread(lambda: getattr(settings, "FOO", None)), None)
+            self.assertEqual(settings.FOO, "main")
+
+    def test_concurrent_overrides(self):
+        """
+        Threads can each enable their own overrides at the same time.
+        """
+        inside = threading.Event()
+        done = threading.Event()
+        def worker():
+            with override_settings(FOO="worker", BAR=SETTING_DELETED):
+                inside.set()
+                done.wait()
+                return settings.FOO, hasattr(settings, "BAR")
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(worker()))
+        with override_settings(FOO="main", BAR=1):
+            thread.start()
+            inside.wait()
+            self.assertEqual((settings.FOO, settings.BAR), ("main", 1))
+            done.set()
+            thread.join()
+            self.assertEqual((settings.FOO, settings.BAR), ("main", 1))
+        self.assertEqual(results, [("worker", False)])
+        self.assertRaises(AttributeError, getattr, settings, "FOO")
+
+    def test_nesting_and_assignment(self):
+        with override_settings(FOO=1):
+            with override_settings(FOO=2):
+                settings.BAR = "new"
+                self.assertEqual((settings.FOO, settings.BAR), (2, "new"))
+            self.assertEqual(settings.FOO, 1)
+            self.assertFalse(hasattr(settings, "BAR"))
+
+    def test_levels_hold_their_own_settings(self):
+        """
+        Enabling an override doesn't copy the settings of the overrides
+        beneath it.
+        """
+        with override_settings(FOO=1, BAR=2):
+            with override_settings(BAZ=3, BAR=SETTING_DELETED):
+                self.assertEqual(sorted(settings._wrapped._get_state().values),
+                                 ['BAR', 'BAZ'])
+                self.assertEqual((settings.FOO, settings.BAZ), (1, 3))
+                self.assertFalse(hasattr(settings, "BAR"))
+                self.assertTrue('FOO' in dir(settings))
+                self.assertFalse('BAR' in dir(settings))
+            self.assertEqual(settings.BAR, 2)
+
+    def test_reads_not_cached(self):
+        """
+        Django 3.1+ settings don't remember what one context read.
+        """
+        with override_settings(FOO="main"):
+            settings.FOO
+            self.assertFalse('FOO' in vars(settings))
+            self.assertEqual(
+                self.run_in_thread(lambda: getattr(settings, "FOO", None)), None)
+
+    def test_scope_fixed_while_enabled(self):
+        with override_settings(FOO=1):
+            self.assertRaises(RuntimeError, set_scope, GLOBAL_SCOPE)
+        self.assertRaises(ValueError, set_scope, 'thread')
+
+class TestSettingChanged(unittest.TestCase):
+    def setUp(self):
+        self.changes = []
+        setting_changed.connect(self.receiver)
+
+    def tearDown(self):
+        setting_changed.disconnect(self.receiver)
+
+    def receiver(self, sender, setting, value, enter, **kwargs):
+        self.changes.append((setting, value, enter))
+
+    def test_enable_and_disable(self):
+        with override_settings(FOO="abc"):
+            self.assertEqual(self.changes, [('FOO', "abc", True)])
+        self.assertEqual(self.changes, [('FOO', "abc", True), ('FOO', None, False)])
+
+    def test_unchanged_values_not_sent(self):
+        """
+        Settings whose effective value stays the same aren't sent.
+        """
+        with override_settings(FOO="abc", BAR=1):
+            del self.changes[:]
+            with override_settings(FOO="abc", BAR=2,
+                                   INSTALLED_APPS=['django.contrib.sites']):
+                self.assertEqual(self.changes, [('BAR', 2, True)])
+            self.assertEqual(self.changes[1:], [('BAR', 1, False)])
+
+    def test_deleted_setting(self):
+        with override_settings(FOO="abc"):
+            with override_settings(FOO=SETTING_DELETED):
+                self.assertEqual(self.changes[-1], ('FOO', None, True))
+            self.assertEqual(self.changes[-1], ('FOO', "abc", False))
+
+    def test_assignment_reverted(self):
+        """
+        Assignments made while an override is enabled are reported, and
+        reported again when they're thrown away.
+        """
+        with override_settings(FOO="abc"):
+            settings.BAR = 1
+            settings.FOO = "xyz"
+            del settings.BAR
+            self.assertEqual(self.changes[1:], [
+                ('BAR', 1, True), ('FOO', "xyz", True), ('BAR', None, True)])
+        self.assertEqual(self.changes[4:], [('FOO', None, False)])
+
+    def test_same_sender_both_ways(self):
+        """
+        Receivers connected for the real settings' class hear both the
+        enter and the exit.
+        """
+        changes = []
+        def receiver(setting, enter, **kwargs):
+            changes.append((setting, enter))
+        setting_changed.connect(receiver, sender=settings._wrapped.__class__)
+        try:
+            with override_settings(FOO="abc"):
+                settings.BAR = 1
+        finally:
+            setting_changed.disconnect(receiver, sender=settings._wrapped.__class__)
+        self.assertEqual(changes[:2], [('FOO', True), ('BAR', True)])
+        self.assertEqual(sorted(changes[2:]), [('BAR', False), ('FOO', False)])
+
+    def test_assignment_in_context_scope(self):
+        set_scope(CONTEXT_SCOPE)
+        try:
+            with override_settings(FOO="abc"):
+                settings.FOO = "xyz"
+                self.assertEqual(self.changes[-1], ('FOO', "xyz", True))
+            self.assertEqual(self.changes[-1], ('FOO', None, False))
+        finally:
+            set_scope(GLOBAL_SCOPE)
+
+@override_settings(FOO="class")
+class TestIncrementalNesting(unittest.TestCase):
+    @override_settings(BAR="method")
+    def test_outer_overrides_visible(self):
+        """
+        Inner scopes see the overrides of every scope around them.
+        """
+        with override_settings(BAZ="block"):
+            self.assertEqual((settings.FOO, settings.BAR, settings.BAZ),
+                             ("class", "method", "block"))
+            self.assertEqual(settings.INSTALLED_APPS, ['django.contrib.sites'])
+
+    def test_push_only_touches_own_settings(self):
+        """
+        Entering a nested override only records the settings it sets.
+        """
+        layered = settings._wrapped
+        settings.INSTALLED_APPS
+        with override_settings(BAR=1, BAZ=2):
+            self.assertEqual(sorted(layered._undo[-1]), ['BAR', 'BAZ'])
+            self.assertTrue('INSTALLED_APPS' in layered.__dict__)
+            settings.QUX = 3
+            self.assertEqual(sorted(layered._undo[-1]), ['BAR', 'BAZ', 'QUX'])
+        self.assertEqual(sorted(layered.__dict__), ['FOO', 'INSTALLED_APPS'])
+
+LOGGING = {
+    'handlers': {
+        'console': {'level': 'INFO', 'class': 'logging.StreamHandler'},
+        'mail_admins': {'level': 'ERROR'},
+    },
+    'loggers': {'django': {'handlers': ['console']}},
+}
+
+@override_settings(LOGGING=LOGGING)
+class TestNestedChange(unittest.TestCase):
+    @override_nested(LOGGING__handlers__console__level='DEBUG')
+    def test_only_changed_branch_copied(self):
+        """
+        Dicts off the changed path are shared with the original.
+        """
+        self.assertEqual(settings.LOGGING['handlers']['console'],
+                         {'level': 'DEBUG', 'class': 'logging.StreamHandler'})
+        self.assertFalse(settings.LOGGING['handlers'] is LOGGING['handlers'])
+        self.assertTrue(settings.LOGGING['loggers'] is LOGGING['loggers'])
+        self.assertTrue(settings.LOGGING['handlers']['mail_admins'] is
+                        LOGGING['handlers']['mail_admins'])
+        self.assertEqual(LOGGING['handlers']['console']['level'], 'INFO')
+
+    def test_restored_on_exit(self):
+        with override_nested(LOGGING__handlers__mail_admins=SETTING_DELETED,
+                             LOGGING__filters__f={'()': 'x'}):
+            self.assertEqual(sorted(settings.LOGGING['handlers']), ['console'])
+            self.assertEqual(settings.LOGGING['filters'], {'f': {'()': 'x'}})
+        self.assertTrue(settings.LOGGING is LOGGING)
+
+    def test_replaced_dict_not_modified(self):
+        """
+        Changes below a dict set by the same override don't touch it.
+        """
+        handlers = {'null': {'level': 'INFO'}}
+        change = NestedChange({('handlers',): handlers,
+                               ('handlers', 'null', 'level'): 'DEBUG'})
+        with override_settings(LOGGING=change):
+            self.assertEqual(settings.LOGGING['handlers'],
+                             {'null': {'level': 'DEBUG'}})
+        self.assertEqual(handlers, {'null': {'level': 'INFO'}})
+
+    def test_not_a_dict(self):
+        override = override_nested(LOGGING__loggers__django__handlers__x=1)
+        self.assertRaises(TypeError, override.enable)
+        self.assertTrue(settings.LOGGING is LOGGING)
+
+    def test_equality(self):
+        self.assertEqual(override_nested(LOGGING__a__b=[1]).delta,
+                         override_nested(LOGGING__a__b=[1]).delta)
+        self.assertRaises(ValueError, override_nested, LOGGING=1)
+
+MIDDLEWARE = ('a.Middleware', 'b.Middleware', 'c.Middleware')
+
+@override_settings(MIDDLEWARE_CLASSES=MIDDLEWARE)
+class TestSequenceChange(unittest.TestCase):
+    def test_operations(self):
+        change = (SequenceChange().append('d.Middleware', 'a.Middleware')
+                  .prepend('z.Middleware').remove('b.Middleware')
+                  .insert_after('a.Middleware', 'y.Middleware')
+                  .insert_before('a.Middleware', 'c.Middleware'))
+        self.assertEqual(change.apply(MIDDLEWARE), (
+            'z.Middleware', 'c.Middleware', 'a.Middleware', 'y.Middleware',
+            'd.Middleware'))
+        self.assertEqual(change.apply(list(MIDDLEWARE))[0], 'z.Middleware')
+        self.assertEqual(SequenceChange().append('a').apply(SETTING_DELETED), ('a',))
+
+    def test_nested_overrides_compose(self):
+        outer = override_settings(
+            MIDDLEWARE_CLASSES=SequenceChange().remove('b.Middleware'))
+        inner = override_settings(
+            MIDDLEWARE_CLASSES=SequenceChange().insert_before('c.Middleware', 'x.Middleware'))
+        with outer:
+            with inner:
+                self.assertEqual(settings.MIDDLEWARE_CLASSES,
+                                 ('a.Middleware', 'x.Middleware', 'c.Middleware'))
+            self.assertEqual(settings.MIDDLEWARE_CLASSES, ('a.Middleware', 'c.Middleware'))
+        self.assertEqual(settings.MIDDLEWARE_CLASSES, MIDDLEWARE)
+
+    def test_missing_anchor(self):
+        override = override_settings(
+            MIDDLEWARE_CLASSES=SequenceChange().insert_after('missing', 'x'))
+        self.assertRaises(ValueError, override.enable)
+        self.assertEqual(settings.MIDDLEWARE_CLASSES, MIDDLEWARE)
+
+    def test_equality(self):
+        self.assertEqual(SequenceChange().append('a').remove(['b']),
+                         SequenceChange().append('a').remove(['b']))
+        self.assertNotEqual(SequenceChange().append('a'), SequenceChange().prepend('a'))
+        self.assertEqual(repr(SequenceChange().insert_after('a', 'b')),
+                         "SequenceChange().insert_after('a', 'b')")
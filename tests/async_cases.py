@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+
+from django.conf import settings
+from override_settings import (
+    override_settings, set_scope, GLOBAL_SCOPE, CONTEXT_SCOPE)
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+class TestCoroutineFunctions(unittest.TestCase):
+    def test_decorated_coroutine_function(self):
+        """
+        The override lasts until the coroutine has finished.
+        """
+        @override_settings(FOO="abc")
+        async def read_foo():
+            await asyncio.sleep(0)
+            return settings.FOO
+
+        self.assertTrue(asyncio.iscoroutinefunction(read_foo))
+        self.assertEqual(run(read_foo()), "abc")
+        self.assertRaises(AttributeError, getattr, settings, "FOO")
+
+    def test_async_with(self):
+        async def read_foo():
+            async with override_settings(FOO="abc"):
+                await asyncio.sleep(0)
+                return settings.FOO
+
+        self.assertEqual(run(read_foo()), "abc")
+        self.assertRaises(AttributeError, getattr, settings, "FOO")
+
+class TestConcurrentTasks(unittest.TestCase):
+    def setUp(self):
+        set_scope(CONTEXT_SCOPE)
+
+    def tearDown(self):
+        set_scope(GLOBAL_SCOPE)
+
+    def test_gather(self):
+        """
+        Tasks running side by side each see their own overrides.
+        """
+        async def read_foo(value):
+            async with override_settings(FOO=value):
+                seen = []
+                for i in range(3):
+                    await asyncio.sleep(0)
+                    seen.append(settings.FOO)
+                return seen
+
+        async def main():
+            return await asyncio.gather(read_foo("a"), read_foo("b"), read_foo("c"))
+
+        self.assertEqual(run(main()), [["a"] * 3, ["b"] * 3, ["c"] * 3])
+        self.assertRaises(AttributeError, getattr, settings, "FOO")
@@ -0,0 +1,36 @@
+import unittest
+
+from override_settings import override_settings, with_apps, without_apps
+from override_settings.apps import cache, update_app_cache
+from override_settings.signals import setting_changed
+
+if cache is not None:
+    class TestUpdateAppCache(unittest.TestCase):
+        def setUp(self):
+            cache._populate()
+            setting_changed.connect(update_app_cache)
+
+        def tearDown(self):
+            setting_changed.disconnect(update_app_cache)
+
+        def model_names(self):
+            return sorted(model._meta.object_name for model in cache.get_models())
+
+        def test_with_apps_loads_added_app(self):
+            self.assertEqual(self.model_names(), ['Site'])
+            with with_apps('django.contrib.contenttypes'):
+                self.assertEqual(self.model_names(), ['ContentType', 'Site'])
+                self.assertEqual(cache.get_app('contenttypes').__name__,
+                                 'django.contrib.contenttypes.models')
+            self.assertEqual(self.model_names(), ['Site'])
+
+        def test_without_apps_unloads_removed_app(self):
+            with without_apps('django.contrib.sites'):
+                self.assertEqual(self.model_names(), [])
+            self.assertEqual(self.model_names(), ['Site'])
+            self.assertEqual(len(set(cache.app_store.values())),
+                             len(cache.app_store))
+
+        def test_unrelated_settings_ignored(self):
+            with override_settings(FOO="abc"):
+                self.assertEqual(self.model_names(), ['Site'])
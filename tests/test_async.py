@@ -0,0 +1,5 @@
+import sys
+
+# The test cases use syntax that's only available from Python 3.5 on.
+if sys.version_info >= (3, 5):
+    from tests.async_cases import *
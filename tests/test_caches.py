@@ -0,0 +1,81 @@
+import unittest
+
+import django.core.cache
+
+from override_settings import override_settings
+from override_settings.caches import CachePool, caches, pool, update_caches
+from override_settings.signals import setting_changed
+
+def locmem(location):
+    return {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                        'LOCATION': location}}
+
+def current_cache():
+    if caches is not None:
+        return caches['default']
+    return django.core.cache.cache
+
+class TestUpdateCaches(unittest.TestCase):
+    def setUp(self):
+        setting_changed.connect(update_caches)
+
+    def tearDown(self):
+        setting_changed.disconnect(update_caches)
+        pool.clear_on_enter = False
+        pool.size = 8
+        pool.clear()
+
+    def test_backend_reused(self):
+        with override_settings(CACHES=locmem('a')):
+            backend = current_cache()
+            backend.set('key', 'value')
+        with override_settings(CACHES=locmem('a')):
+            self.assertTrue(current_cache() is backend)
+            self.assertEqual(current_cache().get('key'), 'value')
+        with override_settings(CACHES=locmem('b')):
+            self.assertFalse(current_cache() is backend)
+
+    def test_original_restored(self):
+        original = current_cache()
+        with override_settings(CACHES=locmem('a')):
+            outer = current_cache()
+            self.assertFalse(outer is original)
+            with override_settings(CACHES=locmem('b')):
+                self.assertFalse(current_cache() is outer)
+            self.assertTrue(current_cache() is outer)
+        self.assertTrue(current_cache() is original)
+
+    def test_outer_backends_kept(self):
+        """
+        A full pool doesn't drop the backends an outer override uses.
+        """
+        pool.size = 1
+        with override_settings(CACHES=locmem('a')):
+            outer = current_cache()
+            outer.set('key', 'value')
+            for location in 'bcd':
+                with override_settings(CACHES=locmem(location)):
+                    pass
+            self.assertTrue(current_cache() is outer)
+        self.assertEqual(len(pool), 1)
+
+    def test_clear_on_enter(self):
+        pool.clear_on_enter = True
+        with override_settings(CACHES=locmem('a')):
+            current_cache().set('key', 'value')
+            with override_settings(CACHES=locmem('b')):
+                pass
+            self.assertEqual(current_cache().get('key'), 'value')
+        with override_settings(CACHES=locmem('a')):
+            self.assertEqual(current_cache().get('key'), None)
+
+class TestCachePool(unittest.TestCase):
+    def test_least_recently_used_dropped(self):
+        pool = CachePool(size=2)
+        a = pool.get('default', locmem('a')['default'])
+        b = pool.get('default', locmem('b')['default'])
+        self.assertTrue(pool.get('default', locmem('a')['default']) is a)
+        pool.get('default', locmem('c')['default'])
+        self.assertEqual(len(pool), 2)
+        self.assertTrue(pool.get('default', locmem('a')['default']) is a)
+        self.assertFalse(pool.get('default', locmem('b')['default']) is b)
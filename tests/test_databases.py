@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from django.db import connections
+
+from override_settings import override_settings
+from override_settings.databases import ConnectionPool, pool, update_connections
+from override_settings.signals import setting_changed
+
+def sqlite(name):
+    return {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': name}}
+
+class TestUpdateConnections(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        setting_changed.connect(update_connections)
+
+    def tearDown(self):
+        setting_changed.disconnect(update_connections)
+        pool.size = 8
+        pool.clear()
+        shutil.rmtree(self.directory)
+
+    def test_connection_reused(self):
+        """
+        Equal DATABASES overrides share a connection, and with it an
+        in-memory database.
+        """
+        with override_settings(DATABASES=sqlite(':memory:')):
+            connection = connections['default']
+            connection.cursor().execute("CREATE TABLE t (x INTEGER)")
+        with override_settings(DATABASES=sqlite(':memory:')):
+            self.assertTrue(connections['default'] is connection)
+            connection.cursor().execute("SELECT x FROM t")
+
+    def test_different_settings_different_connection(self):
+        with override_settings(DATABASES=sqlite(':memory:')):
+            connection = connections['default']
+        with override_settings(DATABASES=sqlite(os.path.join(self.directory, 'db'))):
+            self.assertFalse(connections['default'] is connection)
+            self.assertEqual(connections['default'].settings_dict['NAME'],
+                             os.path.join(self.directory, 'db'))
+
+    def test_original_restored(self):
+        original = connections['default']
+        with override_settings(DATABASES=sqlite(':memory:')):
+            self.assertFalse(connections['default'] is original)
+            with override_settings(DATABASES=sqlite(os.path.join(self.directory, 'db'))):
+                self.assertEqual(connections['default'].settings_dict['NAME'],
+                                 os.path.join(self.directory, 'db'))
+            self.assertEqual(connections['default'].settings_dict['NAME'], ':memory:')
+        self.assertTrue(connections['default'] is original)
+
+    def test_replaced_connections_kept_out_of_pool(self):
+        """
+        However many configurations are used inside an override, the
+        connections it replaced are put back, still open.
+        """
+        pool.size = 2
+        original = connections['default']
+        with override_settings(DATABASES=sqlite(':memory:')):
+            outer = connections['default']
+            outer.cursor().execute("CREATE TABLE keep (x INTEGER)")
+            for name in range(5):
+                path = os.path.join(self.directory, str(name))
+                with override_settings(DATABASES=sqlite(path)):
+                    connections['default'].cursor()
+            self.assertTrue(connections['default'] is outer)
+            outer.cursor().execute("SELECT x FROM keep")
+        self.assertTrue(connections['default'] is original)
+        self.assertEqual(len(pool), 2)
+
+    def test_value_not_changed(self):
+        databases = sqlite(':memory:')
+        with override_settings(DATABASES=databases):
+            connections['default'].cursor()
+        self.assertEqual(databases, sqlite(':memory:'))
+
+    def test_unrelated_settings_ignored(self):
+        original = connections['default']
+        with override_settings(FOO="abc"):
+            self.assertTrue(connections['default'] is original)
+
+class TestConnectionPool(unittest.TestCase):
+    def test_least_recently_used_closed(self):
+        class Connection(object):
+            closed = False
+
+            def __init__(self, name):
+                self.alias = 'default'
+                self.settings_dict = {'NAME': name}
+
+            def close(self):
+                self.closed = True
+
+        pool = ConnectionPool(size=2)
+        first, second, third = [Connection(name) for name in 'abc']
+        for connection in (first, second, third):
+            pool.release(connection)
+        self.assertEqual(len(pool), 2)
+        self.assertTrue(first.closed)
+        self.assertTrue(pool.acquire('default', {'NAME': 'a'}) is None)
+        self.assertTrue(pool.acquire('default', {'NAME': 'b'}) is second)
+        self.assertTrue(pool.acquire('other', {'NAME': 'c'}) is None)
+        pool.clear()
+        self.assertTrue(third.closed)
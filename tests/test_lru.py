@@ -0,0 +1,40 @@
+import unittest
+
+from override_settings._lru import LRUCache
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.evicted = []
+        self.cache = LRUCache(2, on_evict=self.evicted.append)
+
+    def test_least_recently_used_evicted(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.cache.put('c', 3)
+        self.assertEqual(self.evicted, [2])
+        self.assertEqual(self.cache.get('b'), None)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_pinned_kept(self):
+        self.cache.put('a', 1)
+        self.cache.pin('a')
+        self.cache.put('b', 2)
+        self.cache.put('c', 3)
+        self.assertEqual(self.evicted, [2])
+        self.cache.pin('c')
+        self.cache.put('d', 4)
+        self.assertEqual(self.evicted, [2, 4])
+        self.cache.unpin('a')
+        self.cache.put('e', 5)
+        self.assertEqual(self.evicted, [2, 4, 1])
+        self.assertTrue('c' in self.cache)
+
+    def test_pop_and_clear(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.assertEqual(self.cache.pop('a'), 1)
+        self.assertEqual(self.cache.pop('a'), None)
+        self.cache.clear()
+        self.assertEqual(self.evicted, [2])
+        self.assertEqual(len(self.cache), 0)
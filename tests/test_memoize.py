@@ -0,0 +1,74 @@
+import unittest
+
+from django.conf import settings
+from override_settings import override_settings, SETTING_DELETED
+from override_settings.memoize import cached_setting
+from override_settings.signals import setting_changed
+
+class TestCachedSetting(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+        @cached_setting('FOO', 'BAR')
+        def combined(suffix=''):
+            self.calls.append(suffix)
+            return '%s-%s%s' % (getattr(settings, 'FOO', None),
+                                getattr(settings, 'BAR', None), suffix)
+        self.combined = combined
+
+    def tearDown(self):
+        setting_changed.disconnect(self.combined._setting_changed)
+
+    def test_cached(self):
+        self.assertEqual(self.combined(), 'None-None')
+        self.assertEqual(self.combined(), 'None-None')
+        self.assertEqual(self.combined(suffix='!'), 'None-None!')
+        self.assertEqual(self.calls, ['', '!'])
+        self.assertEqual(self.combined.__name__, 'combined')
+
+    def test_invalidated_and_restored(self):
+        """
+        Overriding a dependency recomputes; disabling the override puts
+        the earlier results back without recomputing.
+        """
+        with override_settings(FOO=1):
+            self.assertEqual(self.combined(), '1-None')
+            with override_settings(BAR=2):
+                self.assertEqual(self.combined(), '1-2')
+            self.assertEqual(self.combined(), '1-None')
+        self.assertEqual(self.combined(), 'None-None')
+        with override_settings(FOO=1):
+            self.assertEqual(self.combined(), '1-None')
+        self.assertEqual(self.calls, ['', '', ''])
+
+    def test_assignment_invalidates(self):
+        with override_settings(FOO=1):
+            self.assertEqual(self.combined(), '1-None')
+            settings.FOO = 2
+            self.assertEqual(self.combined(), '2-None')
+        self.assertEqual(self.combined(), 'None-None')
+
+    def test_saved_caches_bounded(self):
+        self.combined.saved_size = 2
+        for value in range(5):
+            with override_settings(FOO=value):
+                self.combined()
+        self.assertEqual(len(self.combined._saved), 2)
+        del self.calls[:]
+        with override_settings(FOO=4):
+            self.combined()
+        with override_settings(FOO=0):
+            self.combined()
+        self.assertEqual(self.calls, [''])
+
+    def test_unrelated_settings_ignored(self):
+        self.combined()
+        with override_settings(BAZ=1, FOO=SETTING_DELETED):
+            self.combined()
+        self.assertEqual(self.calls, [''])
+
+    def test_cache_clear(self):
+        self.combined()
+        self.combined.cache_clear()
+        self.combined()
+        self.assertEqual(self.calls, ['', ''])
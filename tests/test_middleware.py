@@ -0,0 +1,92 @@
+import unittest
+
+from django.conf import global_settings, settings
+from django.http import HttpResponse
+try:
+    from django.utils.deprecation import MiddlewareMixin
+except ImportError:
+    # Django 1.9 and earlier
+    MiddlewareMixin = object
+
+from override_settings import override_settings
+from override_settings.middleware import CachedMiddlewareClient, chains
+
+urlpatterns = []
+
+class CountingMiddleware(MiddlewareMixin):
+    name = 'counting'
+    instances = 0
+
+    def __init__(self, *args):
+        # MIDDLEWARE passes get_response, MIDDLEWARE_CLASSES nothing.
+        super(CountingMiddleware, self).__init__(*args)
+        CountingMiddleware.instances += 1
+
+    def process_request(self, request):
+        return HttpResponse(self.name)
+
+class OtherMiddleware(CountingMiddleware):
+    name = 'other'
+
+class SettingMiddleware(CountingMiddleware):
+    def __init__(self, *args):
+        super(SettingMiddleware, self).__init__(*args)
+        self.name = settings.MIDDLEWARE_NAME
+
+COUNTING = ('tests.test_middleware.CountingMiddleware',)
+OTHER = ('tests.test_middleware.OtherMiddleware',)
+
+# MIDDLEWARE from Django 1.10; MIDDLEWARE_CLASSES is gone from 2.0.
+if hasattr(global_settings, 'MIDDLEWARE'):
+    SETTING = 'MIDDLEWARE'
+else:
+    SETTING = 'MIDDLEWARE_CLASSES'
+
+@override_settings(ROOT_URLCONF='tests.test_middleware', **{SETTING: COUNTING})
+class TestCachedMiddlewareClient(unittest.TestCase):
+    def setUp(self):
+        chains.clear()
+        CountingMiddleware.instances = 0
+
+    def test_loaded_once(self):
+        for i in range(3):
+            self.assertEqual(CachedMiddlewareClient().get('/').content, b'counting')
+        self.assertEqual(CountingMiddleware.instances, 1)
+
+    def test_switches_with_overrides(self):
+        """
+        Overrides switch the middleware of existing clients, and each
+        value of the setting is only loaded once.
+        """
+        client = CachedMiddlewareClient()
+        client.get('/')
+        for i in range(2):
+            with override_settings(**{SETTING: OTHER}):
+                self.assertEqual(client.get('/').content, b'other')
+            self.assertEqual(client.get('/').content, b'counting')
+        self.assertEqual(CountingMiddleware.instances, 2)
+
+    def test_other_settings_ignored(self):
+        """
+        Overrides of other settings don't reload the middleware.
+        """
+        client = CachedMiddlewareClient()
+        client.get('/')
+        with override_settings(FOO=1):
+            client.get('/')
+        self.assertEqual(CountingMiddleware.instances, 1)
+
+    @override_settings(OVERRIDE_SETTINGS_MIDDLEWARE_KEYS=('MIDDLEWARE_NAME',),
+                       **{SETTING: ('tests.test_middleware.SettingMiddleware',)})
+    def test_listed_settings_read_when_loaded(self):
+        """
+        Middleware is loaded again for overrides of the settings listed
+        in OVERRIDE_SETTINGS_MIDDLEWARE_KEYS, and reused when they come
+        back.
+        """
+        client = CachedMiddlewareClient()
+        for i in range(2):
+            for name in ('a', 'b'):
+                with override_settings(MIDDLEWARE_NAME=name):
+                    self.assertEqual(client.get('/').content, name.encode('ascii'))
+        self.assertEqual(CountingMiddleware.instances, 2)
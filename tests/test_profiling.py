@@ -0,0 +1,183 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from django.conf import settings
+from override_settings import override_settings, get_profiler
+from override_settings.profiling import (
+    Profiler, ReadCountingSettings, ProfilingResultMixin, ProfilingTestRunner,
+    TextTestResult, profiling_result_class)
+from override_settings import selection
+from override_settings.runner import BaseRunner
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = Profiler()
+        self.profiler.start()
+
+    def tearDown(self):
+        self.profiler.stop()
+
+    def test_start_and_stop(self):
+        self.assertTrue(get_profiler() is self.profiler)
+        self.profiler.stop()
+        self.assertTrue(get_profiler() is None)
+
+    def test_sites_and_tests(self):
+        outer = override_settings(FOO=1, BAR=2)
+        inner = override_settings(FOO=3)
+        self.assertTrue('test_profiling.py:' in outer.site)
+        self.assertNotEqual(outer.site, inner.site)
+
+        self.profiler.start_test('test_one')
+        with outer:
+            self.assertTrue(isinstance(settings._wrapped, ReadCountingSettings))
+            for i in range(3):
+                with inner:
+                    settings.FOO
+                settings.FOO
+                settings.BAR
+        self.profiler.stop_test('test_one')
+        with inner:
+            pass
+
+        sites = self.profiler.sites
+        self.assertEqual(sites[outer.site]['entries'], 1)
+        self.assertEqual(sites[outer.site]['reads'], {'FOO': 3, 'BAR': 3})
+        self.assertEqual(sites[inner.site]['entries'], 4)
+        self.assertEqual(sites[inner.site]['reads'], {'FOO': 3})
+        self.assertTrue(sites[inner.site]['enter_time'] > 0)
+
+        test = self.profiler.tests['test_one']
+        self.assertEqual(test['entries'], 4)
+        self.assertEqual(test['keys'], set(['FOO', 'BAR']))
+        self.assertEqual(test['reads'], {'FOO': 6, 'BAR': 3})
+
+    def test_enabled_before_start(self):
+        """
+        Overrides enabled before the profiler started can be disabled
+        while it's running, and aren't counted.
+        """
+        self.profiler.stop()
+        override = override_settings(FOO=1)
+        override.enable()
+        self.profiler.start()
+        with override_settings(BAR=1):
+            pass
+        override.disable()
+        self.assertEqual(list(self.profiler.sites.values())[0]['entries'], 1)
+        self.assertEqual(len(self.profiler.sites), 1)
+
+    def test_reports(self):
+        with override_settings(FOO=1):
+            settings.FOO
+        with override_settings(BAR=1):
+            pass
+
+        results = json.loads(self.profiler.to_json(sort='reads'))
+        self.assertEqual([row['keys'] for row in results['sites']],
+                         [['FOO'], ['BAR']])
+        self.assertEqual(results['tests'], [])
+        report = self.profiler.report(sort='entries')
+        self.assertTrue('FOO' in report and 'BAR' in report)
+        self.assertRaises(ValueError, self.profiler.as_dict, 'name')
+
+    def test_unused(self):
+        used = override_settings(FOO=1, BAR=2)
+        unused = override_settings(BAZ=3)
+        with used:
+            with unused:
+                settings.FOO
+        self.assertEqual(self.profiler.unused(), {used.site: ['BAR'], unused.site: ['BAZ']})
+        self.assertEqual(self.profiler.as_dict()['unused'][0]['keys'], ['BAR'])
+        self.assertTrue('never read' in self.profiler.report())
+
+class TestReadTracking(unittest.TestCase):
+    def setUp(self):
+        self.profiler = Profiler(track_reads=True)
+        self.profiler.start()
+
+    def tearDown(self):
+        self.profiler.stop()
+
+    def test_reads_and_index(self):
+        """
+        Every read is recorded per test, overridden or not, and the
+        index selects the tests reading settings that change.
+        """
+        self.assertTrue(isinstance(settings._wrapped, ReadCountingSettings))
+        self.profiler.start_test('test_apps')
+        settings.INSTALLED_APPS
+        self.profiler.stop_test('test_apps')
+        self.profiler.start_test('test_foo')
+        with override_settings(FOO=1):
+            settings.FOO
+        settings.TIME_ZONE
+        self.profiler.stop_test('test_foo')
+        settings.DEBUG
+
+        self.assertEqual(self.profiler.test_reads, {
+            'test_apps': set(['INSTALLED_APPS']),
+            'test_foo': set(['FOO', 'TIME_ZONE'])})
+        index = self.profiler.index()
+        self.assertEqual(index['tests'], ['test_apps', 'test_foo'])
+        self.assertEqual(index['readers']['TIME_ZONE'], ['test_foo'])
+        self.assertEqual(index['fingerprints']['FOO'], None)
+
+        self.assertEqual(selection.changed_settings(index), [])
+        with override_settings(TIME_ZONE='Europe/Paris', FOO=2):
+            changed = selection.changed_settings(index, settings._wrapped)
+        self.assertEqual(changed, ['FOO', 'TIME_ZONE'])
+        self.assertEqual(selection.select_tests(index, changed), set(['test_foo']))
+
+    def test_stop_removes_base_layer(self):
+        self.profiler.stop()
+        self.assertFalse(isinstance(settings._wrapped, ReadCountingSettings))
+
+class TestProfilingTestResult(unittest.TestCase):
+    def test_result_class_wrapped(self):
+        class Result(TextTestResult):
+            pass
+
+        class Case(unittest.TestCase):
+            def test_foo(self):
+                with override_settings(FOO=1):
+                    settings.FOO
+
+        resultclass = profiling_result_class(Result)
+        self.assertTrue(issubclass(resultclass, Result))
+        self.assertTrue(profiling_result_class(resultclass) is resultclass)
+        test = Case('test_foo')
+        profiler = Profiler()
+        profiler.start()
+        try:
+            test.run(resultclass(None, True, 0))
+        finally:
+            profiler.stop()
+        self.assertEqual(list(profiler.tests), [test.id()])
+
+    def test_runner_result_class(self):
+        # Django 1.8 and later
+        if hasattr(BaseRunner, 'get_resultclass'):
+            resultclass = ProfilingTestRunner().get_resultclass()
+            self.assertTrue(issubclass(resultclass, ProfilingResultMixin))
+
+class TestFingerprint(unittest.TestCase):
+    def test_sets_stable_across_processes(self):
+        """
+        A set's fingerprint doesn't depend on string hashing, which is
+        randomized in each process on Python 3.
+        """
+        code = ('from django.conf import settings; settings.configure()\n'
+                'from override_settings.selection import fingerprint\n'
+                'print(fingerprint(set("abcdefgh")))\n')
+        results = set()
+        for seed in ('1', '2', '3'):
+            env = dict(os.environ, PYTHONHASHSEED=seed,
+                       PYTHONPATH=os.pathsep.join(sys.path))
+            process = subprocess.Popen([sys.executable, '-c', code],
+                                       stdout=subprocess.PIPE, env=env)
+            results.add(process.communicate()[0].decode('ascii').strip())
+        self.assertEqual(results, set([selection.fingerprint(set('abcdefgh'))]))
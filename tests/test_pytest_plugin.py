@@ -0,0 +1,122 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+CONFTEST = '''
+from django.conf import settings
+if not settings.configured:
+    settings.configure()
+
+from override_settings.pytest_plugin import settings_fixture
+from override_settings.signals import setting_changed
+
+EVENTS = []
+
+def record(setting, enter, **kwargs):
+    EVENTS.append((setting, enter))
+setting_changed.connect(record)
+
+session_debug = settings_fixture(scope='session', autouse=True, SESSION=1)
+'''
+
+TESTS = '''
+import pytest
+from django.conf import settings
+from override_settings import with_apps
+from conftest import EVENTS
+
+pytestmark = pytest.mark.override_settings(FOO='module')
+
+def test_module():
+    assert settings.SESSION == 1
+    assert settings.FOO == 'module'
+
+@pytest.mark.override_settings(FOO='function', BAR=1)
+def test_function():
+    assert settings.FOO == 'function'
+    assert settings.BAR == 1
+
+@pytest.mark.override_settings(FOO='class')
+class TestClass(object):
+    def test_class(self):
+        assert settings.FOO == 'class'
+
+    @pytest.mark.override_settings(with_apps('django.contrib.sites'), BAR=2)
+    def test_stacked(self):
+        assert settings.FOO == 'class'
+        assert settings.BAR == 2
+        assert 'django.contrib.sites' in settings.INSTALLED_APPS
+
+def test_settings_override(settings_override):
+    settings_override(BAR=3)
+    assert settings.BAR == 3
+
+def test_module_entered_once():
+    # Once each for the module, test_function and TestClass.
+    assert EVENTS.count(('FOO', True)) == 3
+    assert ('BAR', True) in EVENTS
+'''
+
+ORDERED = '''
+import pytest
+
+@pytest.mark.override_settings(FOO=1)
+def test_a():
+    pass
+
+def test_b():
+    pass
+
+@pytest.mark.override_settings(FOO=1)
+def test_c():
+    pass
+'''
+
+if pytest is not None:
+    class TestPytestPlugin(unittest.TestCase):
+        def setUp(self):
+            self.directory = tempfile.mkdtemp()
+            for name, source in (('conftest.py', CONFTEST),
+                                 ('test_marked.py', TESTS),
+                                 ('test_ordered.py', ORDERED)):
+                f = open(os.path.join(self.directory, name), 'w')
+                try:
+                    f.write(source)
+                finally:
+                    f.close()
+
+        def tearDown(self):
+            shutil.rmtree(self.directory)
+
+        def pytest(self, *args):
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            env = dict(os.environ)
+            env['PYTHONPATH'] = os.pathsep.join(
+                [root, self.directory] + [p for p in [env.get('PYTHONPATH')] if p])
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'pytest', '-p', 'override_settings.pytest_plugin',
+                 '-p', 'no:cacheprovider', '-v'] + list(args),
+                cwd=self.directory, env=env,
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            output = process.communicate()[0].decode('utf-8')
+            return process.returncode, output
+
+        def test_scopes(self):
+            returncode, output = self.pytest('test_marked.py')
+            self.assertEqual(returncode, 0, output)
+            self.assertTrue('6 passed' in output, output)
+
+        def test_group_by_settings(self):
+            returncode, output = self.pytest('--group-by-settings', 'test_ordered.py')
+            self.assertEqual(returncode, 0, output)
+            order = [line.split('::')[1].split()[0] for line in output.splitlines()
+                     if line.startswith('test_ordered.py::')]
+            self.assertEqual(order, ['test_a', 'test_c', 'test_b'])
@@ -0,0 +1,258 @@
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+from django.conf import settings
+from django.db import connections
+try:
+    from django.apps import apps
+except ImportError:
+    apps = None
+from override_settings import (
+    override_settings, override_class_settings, SETTING_DELETED,
+    SettingTransform)
+from override_settings import runner
+from override_settings.runner import (
+    group_by_settings, settings_fingerprint, shard_by_settings,
+    ParallelSuite, SettingsGroup)
+from override_settings.databases import pool, update_connections
+from override_settings.signals import setting_changed
+
+class Increment(SettingTransform):
+    def apply(self, value):
+        if value is SETTING_DELETED:
+            value = 0
+        return value + 1
+
+def make_cases(events):
+    foo = override_settings(FOO=1)
+
+    @foo
+    class A(unittest.TestCase):
+        def test_a(self):
+            events.append(('A', settings.FOO))
+
+    class B(unittest.TestCase):
+        def test_b(self):
+            events.append(('B', getattr(settings, 'FOO', None)))
+
+    @override_settings(FOO=1)
+    class C(unittest.TestCase):
+        def test_c1(self):
+            events.append(('C', settings.FOO))
+
+        @override_settings(BAR=2)
+        def test_c2(self):
+            events.append(('C', settings.FOO, settings.BAR))
+
+    @override_class_settings(BAR=SETTING_DELETED)
+    @foo
+    class D(unittest.TestCase):
+        def test_d(self):
+            events.append(('D', settings.FOO))
+
+    return A, B, C, D
+
+class TestGroupBySettings(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.cases = make_cases(self.events)
+        loader = unittest.TestLoader()
+        self.suite = unittest.TestSuite(
+            [loader.loadTestsFromTestCase(case) for case in self.cases])
+
+    def test_fingerprint(self):
+        tests = dict((test._testMethodName, test)
+                     for test in runner.iter_tests(self.suite))
+        self.assertEqual(settings_fingerprint(tests['test_a']),
+                         settings_fingerprint(tests['test_c1']))
+        self.assertEqual(settings_fingerprint(tests['test_b']), ())
+        self.assertEqual(len(settings_fingerprint(tests['test_c2'])), 2)
+        self.assertEqual(len(settings_fingerprint(tests['test_d'])), 2)
+
+    def test_grouped_order(self):
+        """
+        Classes with equal overrides run back to back in their own group.
+        """
+        grouped = group_by_settings(self.suite)
+        self.assertEqual([test._testMethodName for test in runner.iter_tests(grouped)],
+                         ['test_a', 'test_c1', 'test_c2', 'test_b', 'test_d'])
+        self.assertTrue(isinstance(list(grouped)[0], SettingsGroup))
+
+    def test_grouped_run(self):
+        """
+        The group's overrides are only switched on and off once.
+        """
+        changes = []
+        def receiver(setting, enter, **kwargs):
+            changes.append((setting, enter))
+        setting_changed.connect(receiver)
+        try:
+            result = unittest.TestResult()
+            group_by_settings(self.suite).run(result)
+        finally:
+            setting_changed.disconnect(receiver)
+
+        self.assertTrue(result.wasSuccessful(), result.errors + result.failures)
+        self.assertEqual(self.events, [
+            ('A', 1), ('C', 1), ('C', 1, 2), ('B', None), ('D', 1)])
+        self.assertEqual(changes.count(('FOO', True)), 2)
+        self.assertRaises(AttributeError, getattr, settings, 'FOO')
+
+    def test_class_overrides_applied_once(self):
+        """
+        Classes in a group don't enable the overrides the group already
+        has, so they're only applied once.
+        """
+        increment = Increment()
+
+        @override_settings(COUNT=increment)
+        class A(unittest.TestCase):
+            def test_a(self_):
+                self.events.append(settings.COUNT)
+                settings.ASSIGNED = True
+
+        @override_class_settings(COUNT=increment)
+        class B(unittest.TestCase):
+            def test_b(self_):
+                self.events.append((settings.COUNT, hasattr(settings, 'ASSIGNED')))
+
+        loader = unittest.TestLoader()
+        suite = unittest.TestSuite([loader.loadTestsFromTestCase(case)
+                                    for case in (A, B)])
+        result = unittest.TestResult()
+        group_by_settings(suite).run(result)
+        self.assertTrue(result.wasSuccessful(), result.errors + result.failures)
+        self.assertEqual(self.events, [1, (1, False)])
+        self.assertRaises(AttributeError, getattr, settings, 'COUNT')
+
+    def test_module_fixtures_run_once(self):
+        module = types.ModuleType('tests.grouped_module')
+        module.setUpModule = lambda: self.events.append('setUpModule')
+        module.tearDownModule = lambda: self.events.append('tearDownModule')
+        sys.modules[module.__name__] = module
+        try:
+            @override_settings(FOO=1)
+            class A(unittest.TestCase):
+                __module__ = module.__name__
+                def test_a(self_):
+                    self.events.append('a')
+
+            class B(unittest.TestCase):
+                __module__ = module.__name__
+                def test_b(self_):
+                    self.events.append('b')
+
+            loader = unittest.TestLoader()
+            suite = unittest.TestSuite([loader.loadTestsFromTestCase(case)
+                                        for case in (A, B)])
+            result = unittest.TestResult()
+            group_by_settings(suite).run(result)
+        finally:
+            del sys.modules[module.__name__]
+        self.assertTrue(result.wasSuccessful(), result.errors + result.failures)
+        self.assertEqual(self.events, ['setUpModule', 'a', 'b', 'tearDownModule'])
+
+class TestShardBySettings(unittest.TestCase):
+    def setUp(self):
+        self.cases = make_cases([])
+        loader = unittest.TestLoader()
+        self.suite = group_by_settings(unittest.TestSuite(
+            [loader.loadTestsFromTestCase(case) for case in self.cases]))
+
+    def names(self, shard):
+        return [test._testMethodName for test in runner.iter_tests(shard)]
+
+    def test_groups_kept_together(self):
+        shards = shard_by_settings(self.suite, 2)
+        self.assertEqual(sorted(map(self.names, shards)),
+                         [['test_a', 'test_c1', 'test_c2'], ['test_b', 'test_d']])
+
+    def test_large_group_split_by_class(self):
+        """
+        A group too big for one shard is split between its classes, and
+        each part keeps the group's overrides.
+        """
+        shards = shard_by_settings(self.suite, 4)
+        self.assertEqual(sorted(map(self.names, shards)),
+                         [['test_a'], ['test_b'], ['test_c1', 'test_c2'], ['test_d']])
+        for shard in shards:
+            if self.names(shard) in (['test_a'], ['test_c1', 'test_c2']):
+                self.assertEqual(list(shard)[0].deltas, list(self.suite)[0].deltas)
+
+    def test_more_shards_than_tests(self):
+        self.assertEqual(len(shard_by_settings(self.suite, 10)), 4)
+
+class TestParallelSuite(unittest.TestCase):
+    def test_results_merged(self):
+        @override_settings(FOO=1)
+        class Passing(unittest.TestCase):
+            def test_foo(self):
+                self.assertEqual(settings.FOO, 1)
+
+        @override_settings(FOO=2)
+        class Failing(unittest.TestCase):
+            def test_foo(self):
+                self.assertEqual(settings.FOO, 1)
+
+            def test_error(self):
+                raise ValueError("broken")
+
+        loader = unittest.TestLoader()
+        suite = group_by_settings(unittest.TestSuite(
+            [loader.loadTestsFromTestCase(case) for case in (Passing, Failing)]))
+        result = unittest.TestResult()
+        ParallelSuite(shard_by_settings(suite, 2)).run(result)
+
+        self.assertEqual(result.testsRun, 3)
+        self.assertEqual([test._testMethodName for test, error in result.failures],
+                         ['test_foo'])
+        self.assertTrue('AssertionError' in result.failures[0][1])
+        self.assertEqual([test._testMethodName for test, error in result.errors],
+                         ['test_error'])
+        self.assertTrue('broken' in result.errors[0][1])
+        self.assertRaises(AttributeError, getattr, settings, 'FOO')
+
+# Creating test databases needs the app registry from Django 1.7.
+if apps is None or apps.ready:
+    class TestWorkerDatabases(unittest.TestCase):
+        def setUp(self):
+            self.directory = tempfile.mkdtemp()
+            setting_changed.connect(update_connections)
+
+        def tearDown(self):
+            setting_changed.disconnect(update_connections)
+            pool.clear()
+            shutil.rmtree(self.directory)
+
+        def test_database_per_worker(self):
+            """
+            Workers don't share a test database, and theirs are destroyed
+            once they're done.
+            """
+            path = os.path.join(self.directory, 'test.db')
+
+            class Worker(unittest.TestCase):
+                def test_one(self):
+                    self.create_table()
+
+                def test_two(self):
+                    self.create_table()
+
+                def create_table(self):
+                    connection = connections['default']
+                    self.assertNotEqual(connection.settings_dict['NAME'], path)
+                    connection.cursor().execute("CREATE TABLE worker (x INTEGER)")
+
+            tests = list(unittest.TestLoader().loadTestsFromTestCase(Worker))
+            with override_settings(DATABASES={'default': {
+                    'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}}):
+                result = unittest.TestResult()
+                ParallelSuite([unittest.TestSuite([test]) for test in tests]).run(result)
+                self.assertEqual(connections['default'].settings_dict['NAME'], path)
+            self.assertTrue(result.wasSuccessful(), result.errors + result.failures)
+            self.assertEqual(result.testsRun, 2)
+            self.assertEqual(os.listdir(self.directory), [])
@@ -0,0 +1,55 @@
+import pickle
+import unittest
+
+from django.conf import settings
+from override_settings import override_settings, SETTING_DELETED
+from override_settings.snapshot import capture, SettingsSnapshot
+
+class TestSnapshot(unittest.TestCase):
+    def test_only_differences_kept(self):
+        snapshot = capture()
+        self.assertEqual(snapshot.values['INSTALLED_APPS'], ['django.contrib.sites'])
+        self.assertFalse('TIME_ZONE' in snapshot.values)
+        self.assertEqual(snapshot.get('TIME_ZONE'), settings.TIME_ZONE)
+
+    def test_includes_overrides(self):
+        with override_settings(FOO=[1, 2], DEBUG=SETTING_DELETED):
+            snapshot = capture()
+        self.assertEqual(snapshot.values['FOO'], [1, 2])
+        self.assertTrue('DEBUG' in snapshot.deleted)
+        self.assertEqual(snapshot.get('DEBUG', 'missing'), 'missing')
+
+    def test_hashable_and_picklable(self):
+        with override_settings(FOO={'a': [1]}):
+            first, second = capture(), capture()
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        copy = pickle.loads(pickle.dumps(first, 2))
+        self.assertTrue(isinstance(copy, SettingsSnapshot))
+        self.assertEqual(copy, first)
+        self.assertNotEqual(copy, capture())
+
+    def test_diff(self):
+        before = capture()
+        with override_settings(FOO=1, DEBUG=SETTING_DELETED):
+            after = capture()
+        self.assertEqual(before.diff(before), {})
+        self.assertEqual(before.diff(after), {
+            'FOO': (SETTING_DELETED, 1),
+            'DEBUG': (settings.DEBUG, SETTING_DELETED)})
+
+    def test_restore(self):
+        """
+        Restoring a snapshot puts back exactly the settings it captured,
+        whatever is enabled at the time.
+        """
+        with override_settings(FOO=1, DEBUG=SETTING_DELETED):
+            snapshot = pickle.loads(pickle.dumps(capture()))
+        with override_settings(FOO=2, BAR=3):
+            with snapshot.restore():
+                self.assertEqual(settings.FOO, 1)
+                self.assertRaises(AttributeError, getattr, settings, 'DEBUG')
+                self.assertRaises(AttributeError, getattr, settings, 'BAR')
+                self.assertEqual(capture(), snapshot)
+            self.assertEqual(settings.BAR, 3)
+        self.assertRaises(AttributeError, getattr, settings, 'FOO')